@@ -2,9 +2,13 @@ from flask import Flask
 from config import Config
 from logger_config import log_info
 from database import init_database
+from app.upload_stream import HashingRequest
 
 app = Flask(__name__)
 
+# Hash audio uploads while they are received (transcript cache key)
+app.request_class = HashingRequest
+
 # Load configuration from config.py
 app.config.from_object(Config)
 app.secret_key = Config.SECRET_KEY
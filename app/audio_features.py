@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def frame_rms(samples, frame_length, chunk_frames=8192):
+    """
+    RMS energy of consecutive non-overlapping frames
+
+    Works through the signal a chunk of frames at a time so a long
+    int16 recording is never copied to float all at once.
+
+    Args:
+        samples: 1-D int16 (or float) numpy array
+        frame_length: Samples per frame
+        chunk_frames: Frames converted to float per step
+
+    Returns:
+        float32 numpy array with one value per full frame
+    """
+
+    n_frames = len(samples) // frame_length
+    energy = np.empty(n_frames, dtype=np.float32)
+
+    for start in range(0, n_frames, chunk_frames):
+        end = min(start + chunk_frames, n_frames)
+        frames = samples[start * frame_length:end * frame_length]
+        frames = frames.reshape(end - start, frame_length).astype(np.float32)
+        energy[start:end] = np.sqrt(np.mean(frames * frames, axis=1))
+
+    return energy
+
+
+def smooth(values, width):
+    """Moving average over `width` points (same length as input)"""
+
+    if width <= 1 or len(values) == 0:
+        return values
+
+    kernel = np.ones(width, dtype=np.float32) / width
+    return np.convolve(values, kernel, mode='same')
@@ -1,168 +1,208 @@
 import os
+import io
 import json
-import wave
-import subprocess
-from vosk import Model, KaldiRecognizer
-import soundfile as sf
+import time
+import hashlib
 from config import Config
+from app.model_registry import model_registry, get_model_sample_rate, resolve_model_path
+from app.recognizer_pool import recognizer_pool
+from app.audio_stream import open_audio_stream, as_waveform, describe_source, probe_audio
+from app.vad import VoiceActivityDetector
+from app.transcript_cache import transcript_cache, make_cache_key
+from app.upload_stream import HashingStream
+from app.ffmpeg_decoder import FFmpegError
+from app.stream_ingest import IncomingUpload, UploadError
+from app.cancellation import TranscriptionCancelled, cancellation_stats
+from app.checkpoints import checkpoint_store
+from app.audio_quality import analyze_audio_quality
 from logger_config import log_info, log_error
 
 
+def _timed_blocks(blocks, stages):
+    """Yield blocks, adding the time spent producing them to stages['decode']"""
+    
+    iterator = iter(blocks)
+    while True:
+        start = time.perf_counter()
+        block = next(iterator, None)
+        stages['decode'] += time.perf_counter() - start
+        
+        if block is None:
+            return
+        yield block
+
+
+def _parse_result(raw_result, stages):
+    """Text of one Vosk JSON result, adding the parse time to stages['json']"""
+    
+    start = time.perf_counter()
+    result = json.loads(raw_result)
+    stages['json'] += time.perf_counter() - start
+    return result.get('text', '')
+
+
 class AudioTranscriber:
     """
     Base class for audio transcription.
     Future engines (Whisper) can inherit from this!
     """
     
-    def transcribe(self, audio_path):
+    # Whether transcribe() can save and resume from a TranscriptionCheckpoint
+    supports_checkpoints = False
+    
+    def transcribe(self, audio_path, cancel_token=None, checkpoint=None):
         """Override this in child classes"""
         raise NotImplementedError
+    
+    def get_cache_settings(self):
+        """Everything that changes the transcript (part of the cache key)"""
+        return {'engine': self.__class__.__name__}
 
 
 class VoskTranscriber(AudioTranscriber):
     """Vosk-based transcription (lightweight, fast)"""
     
-    def __init__(self):
+    supports_checkpoints = True
+    
+    def __init__(self, model_path=None):
+        self.model_path = model_path or Config.VOSK_MODEL_PATH
         self.model = None
         self._load_model()
+        
+        # Resample uploads to the rate the model was trained at
+        self.target_rate = None
+        if Config.RESAMPLE_TO_MODEL_RATE:
+            self.target_rate = get_model_sample_rate(self.model_path)
+        
+        # Details of the last transcription (VAD stats etc.)
+        self.last_run = {}
     
     def _load_model(self):
-        """Load Vosk model"""
-        try:
-            model_path = Config.VOSK_MODEL_PATH
-            
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Vosk model not found at: {model_path}")
-            
-            log_info(f"Loading Vosk model from: {model_path}")
-            self.model = Model(model_path)
-            log_info("✅ Vosk model loaded successfully")
-            
-        except Exception as e:
-            log_error(f"Failed to load Vosk model: {str(e)}", e)
-            raise
+        """Get Vosk model from the shared registry (loaded once per process)"""
+        self.model = model_registry.get_model(self.model_path)
+    
+    def get_cache_settings(self):
+        """Model, resampling and VAD settings (part of the cache key)"""
+        
+        settings = super().get_cache_settings()
+        settings['model_path'] = self.model_path
+        settings['target_rate'] = self.target_rate
+        
+        if Config.VAD_ENABLED:
+            settings['vad'] = [Config.VAD_FRAME_MS, Config.VAD_PADDING_MS, Config.VAD_MIN_ENERGY,
+                               Config.VAD_ENERGY_RATIO, Config.VAD_ZCR_THRESHOLD]
+        
+        return settings
     
-    def transcribe(self, audio_path):
+    def transcribe(self, audio_path, cancel_token=None, checkpoint=None):
         """
         Transcribe audio file using Vosk
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or an in-memory file object
+            cancel_token: Optional CancellationToken, checked between blocks
+            checkpoint: Optional TranscriptionCheckpoint. Decoding resumes
+                        from its offset, and progress is saved to it every
+                        CHECKPOINT_INTERVAL_SECONDS of audio.
             
         Returns:
             Transcribed text string
+            
+        Raises:
+            TranscriptionCancelled: If the token is cancelled part-way
         """
         try:
-            log_info(f"Starting transcription: {audio_path}")
+            log_info(f"Starting transcription: {describe_source(audio_path)}")
+            
+            # Decode block by block (mono int16) instead of converting to a temp WAV
+            stream = open_audio_stream(audio_path, target_rate=self.target_rate)
             
-            # Convert to WAV if needed
-            wav_path = self._ensure_wav_format(audio_path)
+            # Pick up where an interrupted attempt got to
+            start_frame = 0
+            text_parts = []
+            if checkpoint is not None and checkpoint.sample_rate == stream.output_rate:
+                start_frame = checkpoint.sample_offset
+                text_parts = list(checkpoint.text_parts)
             
-            # Read audio file
-            wf = wave.open(wav_path, "rb")
+            blocks = stream.blocks(start_frame)
             
-            # Check format
-            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != "NONE":
-                log_error("Audio must be WAV format mono PCM")
-                raise ValueError("Audio must be WAV format mono PCM")
+            # Optionally drop silence before it reaches the recognizer
+            vad = None
+            if Config.VAD_ENABLED:
+                vad = VoiceActivityDetector(stream.output_rate)
+                blocks = vad.filter(blocks)
             
-            # Create recognizer
-            rec = KaldiRecognizer(self.model, wf.getframerate())
-            rec.SetWords(True)
+            # Borrow a recognizer from the shared pool
+            stages = {'decode': 0.0, 'recognizer': 0.0, 'json': 0.0}
             
-            # Transcribe
-            text_parts = []
+            # Samples given to the recognizer, and where the last checkpoint was saved
+            fed = 0
+            last_saved = start_frame
+            checkpoint_interval = Config.CHECKPOINT_INTERVAL_SECONDS * stream.output_rate
             
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
+            with recognizer_pool.recognizer(stream.output_rate, self.model_path) as rec:
                 
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    if 'text' in result:
-                        text_parts.append(result['text'])
-            
-            # Final result
-            final_result = json.loads(rec.FinalResult())
-            if 'text' in final_result:
-                text_parts.append(final_result['text'])
+                # Transcribe
+                for block in _timed_blocks(blocks, stages):
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+                    
+                    start = time.perf_counter()
+                    finished = rec.AcceptWaveform(as_waveform(block))
+                    if finished:
+                        raw_result = rec.Result()
+                    stages['recognizer'] += time.perf_counter() - start
+                    fed += len(block)
+                    
+                    if finished:
+                        text_parts.append(_parse_result(raw_result, stages))
+                        
+                        # Utterance boundary: everything before here is final
+                        if checkpoint is not None:
+                            # With VAD the recognizer only saw speech; map back to the recording
+                            recognized = fed
+                            if vad is not None:
+                                recognized = round(vad.to_original_time(fed / stream.output_rate) * stream.output_rate)
+                            position = start_frame + recognized
+                            
+                            if position - last_saved >= checkpoint_interval:
+                                checkpoint.save([part for part in text_parts if part], position, stream.output_rate)
+                                last_saved = position
+                
+                # Final result
+                start = time.perf_counter()
+                raw_result = rec.FinalResult()
+                stages['recognizer'] += time.perf_counter() - start
+                text_parts.append(_parse_result(raw_result, stages))
             
             # Combine all parts
-            full_text = ' '.join(text_parts).strip()
+            full_text = ' '.join(part for part in text_parts if part).strip()
             
-            wf.close()
+            self.last_run = {
+                'mode': 'serial',
+                'audio_seconds': round(stream.duration, 2),
+                'stages': {name: round(seconds, 4) for name, seconds in stages.items()}
+            }
+            if vad is not None:
+                self.last_run['vad'] = vad.get_stats()
+                log_info(f"VAD skipped {vad.get_stats()['skipped_fraction']:.1%} of the audio")
             
-            # Cleanup temp WAV if we converted
-            if wav_path != audio_path and os.path.exists(wav_path):
-                os.remove(wav_path)
+            if start_frame:
+                self.last_run['resumed_from_seconds'] = round(start_frame / stream.output_rate, 2)
+            
+            if checkpoint is not None:
+                checkpoint.clear()
             
             log_info(f"✅ Transcription complete: {len(full_text)} characters")
             return full_text
             
-        except Exception as e:
-            log_error(f"Transcription failed: {str(e)}", e)
+        except TranscriptionCancelled:
+            log_info(f"Transcription stopped: {cancel_token.reason}")
             raise
-    
-    def _ensure_wav_format(self, audio_path):
-        """Convert audio to WAV format if needed"""
-        
-        # If already WAV, check if it needs conversion
-        if audio_path.lower().endswith('.wav'):
-            return self._convert_to_mono_wav(audio_path)
-        
-        # Convert to WAV
-        output_path = audio_path.rsplit('.', 1)[0] + '_converted.wav'
-        
-        try:
-            log_info(f"Converting {audio_path} to WAV format")
-            
-            # Read with soundfile
-            data, samplerate = sf.read(audio_path)
-            
-            # Convert to mono if stereo
-            if len(data.shape) > 1:
-                data = data.mean(axis=1)
-            
-            # Write as WAV
-            sf.write(output_path, data, samplerate, subtype='PCM_16')
-            
-            log_info(f"✅ Converted to: {output_path}")
-            return output_path
             
         except Exception as e:
-            log_error(f"Audio conversion failed: {str(e)}", e)
+            log_error(f"Transcription failed: {str(e)}", e)
             raise
-    
-    def _convert_to_mono_wav(self, wav_path):
-        """Ensure WAV is mono and correct format"""
-        
-        try:
-            wf = wave.open(wav_path, "rb")
-            
-            # Check if already correct format
-            if wf.getnchannels() == 1 and wf.getsampwidth() == 2:
-                wf.close()
-                return wav_path
-            
-            wf.close()
-            
-            # Need to convert
-            output_path = wav_path.rsplit('.', 1)[0] + '_mono.wav'
-            
-            data, samplerate = sf.read(wav_path)
-            
-            # Convert to mono if stereo
-            if len(data.shape) > 1:
-                data = data.mean(axis=1)
-            
-            sf.write(output_path, data, samplerate, subtype='PCM_16')
-            
-            return output_path
-            
-        except Exception as e:
-            log_error(f"WAV conversion failed: {str(e)}", e)
-            return wav_path
 
 
 # Future-proof: Easy to add Whisper later!
@@ -176,21 +216,38 @@ class WhisperTranscriber(AudioTranscriber):
         # Will implement later
         raise NotImplementedError("Whisper not implemented yet")
     
-    def transcribe(self, audio_path):
+    def transcribe(self, audio_path, cancel_token=None, checkpoint=None):
         # Will implement later
         raise NotImplementedError("Whisper not implemented yet")
 
 
-def get_transcriber():
+def get_transcriber(model_name=None, streaming=False):
     """
     Factory function: Returns the configured transcriber
     To switch to Whisper later, just change SPEECH_ENGINE in .env!
+    
+    Args:
+        model_name: Named Vosk model from VOSK_MODELS (default model if None)
+        streaming: The audio is an upload still arriving. Two-pass and
+                   parallel transcription need the whole recording first,
+                   so these always get the block-by-block transcriber.
     """
     
     engine = Config.SPEECH_ENGINE.lower()
     
     if engine == 'vosk':
-        return VoskTranscriber()
+        model_path = resolve_model_path(model_name)
+        if streaming:
+            return VoskTranscriber(model_path)
+        if Config.REDECODE_MODEL:
+            # Imported here because it builds on VoskTranscriber
+            from app.two_pass_transcriber import TwoPassVoskTranscriber
+            return TwoPassVoskTranscriber(model_path)
+        if Config.PARALLEL_TRANSCRIPTION:
+            # Imported here because it builds on VoskTranscriber
+            from app.parallel_transcriber import ParallelVoskTranscriber
+            return ParallelVoskTranscriber(model_path)
+        return VoskTranscriber(model_path)
     elif engine == 'whisper':
         return WhisperTranscriber()
     else:
@@ -198,38 +255,110 @@ def get_transcriber():
         raise ValueError(f"Unknown speech engine: {engine}. Use 'vosk' or 'whisper'")
 
 
-def transcribe_audio(audio_path):
+def transcribe_audio(audio_path, audio_hash=None, model_name=None, cancel_token=None):
     """
     Main function to transcribe audio
     
     Args:
-        audio_path: Path to audio file
+        audio_path: Path to audio file, an in-memory file object, or an
+                    IncomingUpload still being received
+        audio_hash: SHA-256 of the uploaded bytes (enables the transcript cache)
+        model_name: Named Vosk model to use (default model if None)
+        cancel_token: Optional CancellationToken to stop the decode early
         
     Returns:
         tuple: (transcribed_text, error_message)
     """
     
+    # Streamed uploads are decoded as they arrive, so their hash is only
+    # known afterwards (the transcript is still cached for next time)
+    streaming = isinstance(audio_path, IncomingUpload)
+    
     try:
         # Get the appropriate transcriber
-        transcriber = get_transcriber()
+        transcriber = get_transcriber(model_name, streaming)
+        
+        # Same recording + same settings = same transcript
+        cache_key = None
+        if audio_hash and Config.TRANSCRIPT_CACHE_ENABLED:
+            cache_key = make_cache_key(audio_hash, transcriber.get_cache_settings())
+            cached_text = transcript_cache.get(cache_key)
+            
+            if cached_text is not None:
+                log_info(f"✅ Transcript cache hit: {len(cached_text)} characters")
+                return cached_text, None
+        
+        # Long transcriptions save their progress, so a retry after a crash resumes
+        checkpoint = None
+        if audio_hash and Config.CHECKPOINTS_ENABLED and transcriber.supports_checkpoints:
+            checkpoint = checkpoint_store.open(make_cache_key(audio_hash, transcriber.get_cache_settings()))
         
         # Transcribe
-        text = transcriber.transcribe(audio_path)
+        text = transcriber.transcribe(audio_path, cancel_token, checkpoint)
         
         if not text or len(text.strip()) < 10:
             return None, "Transcription too short. Please speak clearly or check audio quality."
         
+        if streaming and Config.TRANSCRIPT_CACHE_ENABLED:
+            cache_key = make_cache_key(audio_path.sha256, transcriber.get_cache_settings())
+        
+        if cache_key:
+            transcript_cache.put(cache_key, text)
+        
         return text, None
         
+    except TranscriptionCancelled:
+        cancellation_stats.record(cancel_token.reason)
+        return None, "Transcription was cancelled"
+    
     except FileNotFoundError as e:
         log_error(f"Model file not found: {str(e)}", e)
         return None, "Speech recognition model not found. Please contact administrator."
     
+    except TimeoutError as e:
+        log_error(f"No recognizer available: {str(e)}", e)
+        return None, str(e)
+    
+    except FFmpegError as e:
+        log_error(f"Audio decoding failed: {str(e)}", e)
+        return None, str(e)
+    
+    except UploadError as e:
+        log_error(f"Streamed upload rejected: {str(e)}")
+        return None, str(e)
+    
     except Exception as e:
         log_error(f"Transcription error: {str(e)}", e)
         return None, f"Failed to transcribe audio: {str(e)}"
 
 
+def get_upload_hash(file):
+    """
+    SHA-256 of an uploaded file
+    
+    Uploads received through HashingRequest were hashed while they arrived;
+    anything else is read once here.
+    
+    Args:
+        file: Flask file object
+        
+    Returns:
+        Hex digest string
+    """
+    
+    stream = getattr(file, 'stream', None)
+    if isinstance(stream, HashingStream):
+        return stream.sha256
+    
+    hasher = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(1024 * 1024), b''):
+        hasher.update(chunk)
+    file.seek(0)
+    
+    return hasher.hexdigest()
+
+
 def validate_audio_file(file):
     """
     Validate uploaded audio file
@@ -267,6 +396,78 @@ def validate_audio_file(file):
     return True, None
 
 
+def probe_audio_file(file):
+    """
+    Check an upload's length from its header, before anything is decoded
+    
+    Compressed files can hold hours of audio in a few MB, so the byte size
+    alone says little about how long transcription will take.
+    
+    Args:
+        file: Flask file object
+        
+    Returns:
+        tuple: (audio_info, error_message)
+    """
+    
+    try:
+        audio_info = probe_audio(file.stream)
+    except Exception as e:
+        log_error(f"Audio probe failed: {str(e)}")
+        return None, "Could not read audio file. Please upload a valid recording."
+    finally:
+        file.seek(0)
+    
+    max_seconds = Config.MAX_AUDIO_DURATION_MINUTES * 60
+    
+    # Some containers (browser webm) don't store a duration; the ffmpeg
+    # decoder enforces the limit while decoding instead
+    if audio_info['duration_seconds'] is None:
+        return audio_info, None
+    
+    if audio_info['duration_seconds'] > max_seconds:
+        return None, f"Recording too long. Maximum length: {Config.MAX_AUDIO_DURATION_MINUTES} minutes"
+    
+    if audio_info['duration_seconds'] == 0:
+        return None, "Recording contains no audio"
+    
+    return audio_info, None
+
+
+def check_audio_quality(file):
+    """
+    Reject silent, clipped or noise-only uploads before they are decoded
+    
+    Looks at QUALITY_WINDOWS short windows spread over the recording, so
+    the check takes well under a second however long the upload is.
+    Formats soundfile can't seek in (m4a, webm...) aren't checked.
+    
+    Args:
+        file: Flask file object
+        
+    Returns:
+        tuple: (quality report or None if not checked, error_message)
+    """
+    
+    if not Config.QUALITY_CHECK_ENABLED:
+        return None, None
+    
+    try:
+        report, error_msg = analyze_audio_quality(file.stream)
+    except Exception as e:
+        log_info(f"Skipping signal-quality check: {str(e)}")
+        return None, None
+    finally:
+        file.seek(0)
+    
+    if error_msg:
+        log_info(f"🔇 Recording rejected ({report['reason']}) after {report['check_seconds']:.2f}s: "
+                 f"level {report['rms_dbfs']} dBFS, clipping {report['clipping_ratio']:.1%}, "
+                 f"speech {report['speech_fraction']:.1%}")
+    
+    return report, error_msg
+
+
 def save_uploaded_audio(file):
     """
     Save uploaded audio file
@@ -296,8 +497,36 @@ def save_uploaded_audio(file):
     return filepath
 
 
+def load_uploaded_audio(file):
+    """
+    Get an uploaded audio file ready for transcription
+    
+    Uploads up to AUDIO_SPOOL_THRESHOLD_MB are kept in memory and decoded
+    from there; only bigger ones are written to the upload folder.
+    
+    Args:
+        file: Flask file object
+        
+    Returns:
+        In-memory file object, or path to saved file
+    """
+    
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+    file.seek(0)
+    
+    if file_size > Config.AUDIO_SPOOL_THRESHOLD_MB * 1024 * 1024:
+        return save_uploaded_audio(file)
+    
+    log_info(f"Audio file kept in memory ({file_size} bytes)")
+    return io.BytesIO(file.read())
+
+
 def cleanup_audio_file(filepath):
-    """Delete audio file after processing"""
+    """Delete audio file after processing (in-memory uploads need nothing)"""
+    
+    if not isinstance(filepath, str):
+        return
     
     if Config.AUTO_DELETE_AUDIO and os.path.exists(filepath):
         try:
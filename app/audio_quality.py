@@ -0,0 +1,216 @@
+import time
+import threading
+import numpy as np
+from config import Config
+from app.audio_stream import downmix_to_mono
+from app.audio_features import frame_rms
+
+
+# Analysis rate; energy statistics don't need more bandwidth than this
+ANALYSIS_RATE = 8000
+
+# |sample| at or above this counts as clipped (a little under full scale,
+# since lossy codecs smear clipped peaks)
+CLIP_LEVEL = 32000
+
+FRAME_MS = 30
+
+# Frame RMS below this (about -80 dBFS) is digital silence or dither: gaps
+# like that say nothing about the background noise level
+MIN_NOISE_FLOOR = 3.0
+
+
+def read_windows(source, windows, window_seconds):
+    """
+    Read short windows spread evenly over a recording
+
+    Only the windows are decoded (soundfile seeks between them), so the
+    cost doesn't grow with the length of the recording. Recordings shorter
+    than all the windows together are read whole.
+
+    Args:
+        source: Path or seekable file-like object (left rewound)
+        windows: Number of windows
+        window_seconds: Length of each window
+
+    Returns:
+        tuple: (int16 array of shape (frames, channels), sample_rate)
+
+    Raises:
+        sf.LibsndfileError: If soundfile can't read the format
+    """
+
+    import soundfile as sf
+
+    try:
+        with sf.SoundFile(source) as f:
+            sample_rate = f.samplerate
+            window = int(window_seconds * sample_rate)
+
+            if f.frames <= window * windows:
+                return f.read(dtype='int16', always_2d=True), sample_rate
+
+            parts = []
+            for start in np.linspace(0, f.frames - window, windows).astype(np.int64):
+                f.seek(int(start))
+                parts.append(f.read(window, dtype='int16', always_2d=True))
+
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    return np.concatenate(parts), sample_rate
+
+
+def measure_signal(samples, sample_rate):
+    """
+    Level, clipping and a rough speech estimate of int16 audio
+
+    Speech frames are those louder than VAD_ENERGY_RATIO times the noise
+    floor, taken as the quietest tenth of frames in the whole sample.
+    Steady noise or hum stays close to that floor, speech rises well above
+    it between pauses. Digitally silent frames (below MIN_NOISE_FLOOR) are
+    left out of the floor, so a muted lead-in can't make steady noise look
+    like speech. Apart from that there is no absolute minimum (unlike the
+    VAD's VAD_MIN_ENERGY), so quiet far-field recordings still count as
+    speech; recordings too quiet to use are caught by the level check instead.
+
+    Args:
+        samples: int16 array, mono or (frames, channels)
+        sample_rate: Sample rate of `samples`
+
+    Returns:
+        Dictionary with rms_dbfs, peak_dbfs, clipping_ratio, speech_fraction
+        and noise_floor_dbfs
+    """
+
+    # Clipping is a per-channel, full-rate property
+    magnitude = np.abs(samples.astype(np.int32))
+    clipping_ratio = np.count_nonzero(magnitude >= CLIP_LEVEL) / magnitude.size if magnitude.size else 0.0
+    peak = int(magnitude.max()) if magnitude.size else 0
+
+    mono = downmix_to_mono(samples) if samples.ndim == 2 else samples
+
+    # Plain decimation: aliasing moves energy between frequencies but
+    # keeps the total, which is all the frame energies need
+    step = max(1, sample_rate // ANALYSIS_RATE)
+    mono = mono[::step]
+    rate = sample_rate / step
+
+    energy = frame_rms(mono, max(1, int(rate * FRAME_MS / 1000)))
+
+    if len(energy) == 0:
+        return {
+            'rms_dbfs': None,
+            'peak_dbfs': None,
+            'clipping_ratio': round(clipping_ratio, 4),
+            'speech_fraction': 0.0,
+            'noise_floor_dbfs': None
+        }
+
+    rms = float(np.sqrt(np.mean(energy.astype(np.float64) ** 2)))
+    audible = energy[energy >= MIN_NOISE_FLOOR]
+    noise_floor = float(np.percentile(audible, 10)) if len(audible) else 0.0
+    threshold = max(noise_floor, MIN_NOISE_FLOOR) * Config.VAD_ENERGY_RATIO
+    speech_fraction = np.count_nonzero(energy > threshold) / len(energy)
+
+    return {
+        'rms_dbfs': to_dbfs(rms),
+        'peak_dbfs': to_dbfs(peak),
+        'clipping_ratio': round(clipping_ratio, 4),
+        'speech_fraction': round(speech_fraction, 4),
+        'noise_floor_dbfs': to_dbfs(noise_floor)
+    }
+
+
+def to_dbfs(value):
+    """int16 amplitude in dB relative to full scale (-inf for digital silence)"""
+
+    if value <= 0:
+        return float('-inf')
+    return round(20 * np.log10(value / 32768), 1)
+
+
+def judge_signal(report):
+    """
+    Why a measured recording isn't worth transcribing
+
+    Returns:
+        tuple: (reason or None, error message or None)
+    """
+
+    if report['rms_dbfs'] is None:
+        return 'empty', "Recording contains no audio"
+
+    if report['rms_dbfs'] < Config.QUALITY_MIN_RMS_DBFS:
+        level = 'no signal' if report['rms_dbfs'] == float('-inf') else f"{report['rms_dbfs']:.0f} dBFS"
+        return 'silent', (f"Recording is silent ({level}). "
+                          f"Please check that the microphone was on and not muted.")
+
+    if report['clipping_ratio'] > Config.QUALITY_MAX_CLIPPING:
+        return 'clipped', (f"Recording is heavily clipped ({report['clipping_ratio']:.0%} of samples "
+                           f"at full scale). Please record again with a lower input volume.")
+
+    if report['speech_fraction'] < Config.QUALITY_MIN_SPEECH_FRACTION:
+        return 'no_speech', ("No speech detected. The recording seems to contain only "
+                             "steady noise.")
+
+    return None, None
+
+
+def analyze_audio_quality(source):
+    """
+    Measure a recording from a sample of short windows and judge it
+
+    Args:
+        source: Path or seekable file-like object (left rewound)
+
+    Returns:
+        tuple: (report dict, error message or None)
+        The report includes the measurements, the rejection `reason` (or
+        None), analysed_seconds and the time the check took.
+
+    Raises:
+        sf.LibsndfileError: If soundfile can't read the format
+    """
+
+    start = time.perf_counter()
+
+    samples, sample_rate = read_windows(source, Config.QUALITY_WINDOWS, Config.QUALITY_WINDOW_SECONDS)
+    report = measure_signal(samples, sample_rate)
+    reason, error = judge_signal(report)
+
+    report['reason'] = reason
+    report['analysed_seconds'] = round(len(samples) / sample_rate, 2) if sample_rate else 0.0
+    report['check_seconds'] = round(time.perf_counter() - start, 4)
+
+    quality_stats.record(reason)
+
+    return report, error
+
+
+class QualityStats:
+    """Process-wide count of checked recordings and rejections per reason"""
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = {}
+        self._lock = threading.Lock()
+
+    def record(self, reason):
+        with self._lock:
+            self.checked += 1
+            if reason is not None:
+                self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'checked': self.checked,
+                'rejected': sum(self.rejected.values()),
+                'by_reason': dict(self.rejected)
+            }
+
+
+# Shared by every request in this process
+quality_stats = QualityStats()
@@ -0,0 +1,340 @@
+import mmap
+import struct
+import numpy as np
+from config import Config
+from app.resampler import Resampler
+from app.ffmpeg_decoder import FFmpegStream, ffmpeg_available, ffprobe_audio
+
+# soundfile (libsndfile) and vosk are native libraries, so they are only
+# imported once audio is actually decoded, not when a web worker starts
+
+# vosk's cffi handle lets AcceptWaveform read straight from our buffers
+# (None = not looked up yet, False = this vosk build doesn't expose it)
+_ffi = None
+
+
+def as_waveform(block):
+    """
+    Wrap an int16 block for AcceptWaveform without copying it into bytes
+
+    Falls back to tobytes() if the vosk build doesn't expose its cffi handle.
+    """
+
+    global _ffi
+
+    block = np.ascontiguousarray(block)
+
+    if _ffi is None:
+        try:
+            from vosk import _ffi as ffi
+        except ImportError:
+            ffi = False
+        _ffi = ffi
+
+    if _ffi is False:
+        return block.tobytes()
+
+    return _ffi.from_buffer(block)
+
+
+def describe_source(source):
+    """Readable name for a file path or an in-memory upload (for logs)"""
+
+    if isinstance(source, str):
+        return source
+
+    if hasattr(source, 'describe'):
+        return source.describe()
+
+    return f"<in-memory audio, {len(source.getbuffer())} bytes>"
+
+
+def probe_audio(source):
+    """
+    Read only the container header of an audio file
+
+    Args:
+        source: Path or seekable file-like object (left rewound)
+
+    Returns:
+        Dictionary with duration_seconds, sample_rate, channels and format
+
+    Raises:
+        sf.LibsndfileError: If the header can't be read
+        FFmpegError: If ffprobe can't read it either
+    """
+
+    import soundfile as sf
+
+    try:
+        info = sf.info(source)
+    except sf.LibsndfileError:
+        # m4a, webm... (duration may be None if the container doesn't store it)
+        if not ffmpeg_available():
+            raise
+        return ffprobe_audio(source)
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    return {
+        'duration_seconds': round(info.frames / info.samplerate, 2) if info.samplerate else 0,
+        'sample_rate': info.samplerate,
+        'channels': info.channels,
+        'format': info.format
+    }
+
+
+def find_wav_data(buffer):
+    """
+    Locate the sample data of a mono 16-bit PCM WAV
+
+    Walks the RIFF chunks of an in-memory or memory-mapped file.
+
+    Args:
+        buffer: Anything supporting slicing and struct.unpack_from (mmap, memoryview)
+
+    Returns:
+        tuple: (offset, length) in bytes, or None if this isn't a mono 16-bit PCM WAV
+    """
+
+    if len(buffer) < 12 or buffer[0:4] != b'RIFF' or buffer[8:12] != b'WAVE':
+        return None
+
+    position = 12
+    is_mono_pcm16 = False
+
+    while position + 8 <= len(buffer):
+        chunk_id = bytes(buffer[position:position + 4])
+        size = struct.unpack_from('<I', buffer, position + 4)[0]
+        body = position + 8
+
+        if chunk_id == b'fmt ' and size >= 16:
+            format_tag, channels, _, _, _, bits = struct.unpack_from('<HHIIHH', buffer, body)
+
+            # WAVE_FORMAT_EXTENSIBLE keeps the real format in its sub-format GUID
+            if format_tag == 0xFFFE and size >= 40:
+                format_tag = struct.unpack_from('<H', buffer, body + 24)[0]
+
+            is_mono_pcm16 = format_tag == 1 and channels == 1 and bits == 16
+
+        elif chunk_id == b'data':
+            if not is_mono_pcm16:
+                return None
+
+            # Streamed WAVs may leave the size unset (0 or 0xFFFFFFFF)
+            length = min(size, len(buffer) - body) if size else len(buffer) - body
+            return body, length - length % 2
+
+        # Chunks are padded to an even size
+        position = body + size + (size & 1)
+
+    return None
+
+
+def downmix_to_mono(block):
+    """
+    Average the channels of one (frames, channels) int16 block
+
+    Sums in int32 so loud stereo samples can't overflow before dividing.
+    """
+
+    if block.shape[1] == 1:
+        return block[:, 0]
+
+    return (block.sum(axis=1, dtype=np.int32) // block.shape[1]).astype(np.int16)
+
+
+class AudioStream:
+    """
+    Decodes an audio file block by block as mono int16 PCM.
+
+    `source` can be a path or a seekable file-like object (e.g. an upload
+    kept in memory). With `target_rate` set, blocks are resampled on the
+    fly (e.g. 44.1 kHz uploads down to the model's 16 kHz). Only one
+    block is held in memory at a time, so peak memory depends on
+    `block_frames`, not on how long the recording is.
+
+    Mono 16-bit WAVs that need no resampling skip decoding altogether:
+    the file is memory-mapped (or an in-memory upload's buffer is used)
+    and blocks are numpy views straight into it, with no copies at all.
+    """
+
+    def __init__(self, source, block_frames=None, target_rate=None):
+        self.source = source
+        self.block_frames = block_frames or Config.AUDIO_BLOCK_FRAMES
+
+        import soundfile as sf
+        info = sf.info(source)
+        self._rewind()
+
+        self.sample_rate = info.samplerate
+        self.channels = info.channels
+        self.frames = info.frames
+        self.format = info.format
+        self.subtype = info.subtype
+
+        # Rate of the blocks we hand out
+        self.output_rate = int(target_rate or self.sample_rate)
+
+        # Already in the format the recognizer wants, so it can be read in place
+        self.zero_copy = (
+            self.format == 'WAV' and self.subtype == 'PCM_16' and
+            self.channels == 1 and self.output_rate == self.sample_rate
+        )
+
+    def _rewind(self):
+        """File-like sources are read more than once (header, then data)"""
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+
+    @property
+    def duration(self):
+        """Length in seconds (from the header, may be 0 if unknown)"""
+        return self.frames / self.sample_rate if self.sample_rate else 0
+
+    def mapped_samples(self):
+        """
+        All samples as one read-only int16 view of the file (no copy)
+
+        Returns:
+            numpy array, or None if the source can't be read in place
+        """
+
+        if not self.zero_copy:
+            return None
+
+        if isinstance(self.source, str):
+            with open(self.source, 'rb') as f:
+                try:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty file
+                    return None
+        elif hasattr(self.source, 'getbuffer'):
+            buffer = self.source.getbuffer()
+        else:
+            return None
+
+        data = find_wav_data(buffer)
+
+        if data is None:
+            if isinstance(buffer, memoryview):
+                buffer.release()
+            else:
+                buffer.close()
+            return None
+
+        # The array keeps the mapping alive; it is unmapped once the last view is gone
+        offset, length = data
+        return np.frombuffer(buffer, dtype='<i2', count=length // 2, offset=offset)
+
+    def blocks(self, start_frame=0):
+        """
+        Yield mono int16 numpy blocks of up to `block_frames` samples
+
+        The same read buffer is reused for every block, so copy a block
+        if you need to keep it after asking for the next one.
+
+        Args:
+            start_frame: Skip to this frame (at the output rate) first,
+                         e.g. to resume from a checkpoint
+        """
+
+        samples = self.mapped_samples()
+        if samples is not None:
+            for position in range(start_frame, len(samples), self.block_frames):
+                yield samples[position:position + self.block_frames]
+            return
+
+        buffer = np.empty((self.block_frames, self.channels), dtype=np.int16)
+        self._rewind()
+
+        resampler = None
+        if self.output_rate != self.sample_rate:
+            resampler = Resampler(self.sample_rate, self.output_rate)
+
+        import soundfile as sf
+
+        with sf.SoundFile(self.source) as f:
+            if start_frame:
+                f.seek(min(self.frames, round(start_frame * self.sample_rate / self.output_rate)))
+
+            while True:
+                block = f.read(self.block_frames, dtype='int16', always_2d=True, out=buffer)
+                if len(block) == 0:
+                    break
+
+                block = downmix_to_mono(block)
+
+                if resampler is not None:
+                    block = resampler.process(block)
+                    if len(block) == 0:
+                        continue
+
+                yield block
+
+        if resampler is not None:
+            tail = resampler.flush()
+            if len(tail):
+                yield tail
+
+
+def open_audio_stream(source, block_frames=None, target_rate=None):
+    """
+    Block decoder for a recording: soundfile when it can read the format,
+    otherwise an ffmpeg pipe (m4a, webm/opus...) if ffmpeg is installed
+
+    Returns:
+        AudioStream or FFmpegStream (or whatever a streamed upload's
+        open_stream() returns)
+    """
+
+    # Uploads that are still arriving pick their own decoder
+    if hasattr(source, 'open_stream'):
+        return source.open_stream(block_frames, target_rate)
+
+    import soundfile as sf
+
+    try:
+        return AudioStream(source, block_frames, target_rate)
+    except sf.LibsndfileError:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        if not ffmpeg_available():
+            raise
+        return FFmpegStream(source, block_frames, target_rate)
+
+
+def load_mono_int16(source, target_rate=None):
+    """
+    Decode a whole file into one mono int16 array (optionally resampled)
+
+    Streams into a preallocated buffer, so memory use is 2 bytes per
+    sample instead of sf.read()'s 8 bytes per sample per channel. Mono
+    16-bit WAVs come back as a read-only view of the file instead.
+
+    Returns:
+        tuple: (samples, sample_rate)
+    """
+
+    stream = open_audio_stream(source, target_rate=target_rate)
+
+    # Mono 16-bit WAVs are used in place
+    samples = stream.mapped_samples()
+    if samples is not None:
+        return samples, stream.output_rate
+
+    # (ffmpeg pipes don't know their length up front and start empty)
+    samples = np.empty(-(-stream.frames * stream.output_rate // stream.sample_rate), dtype=np.int16)
+    position = 0
+
+    for block in stream.blocks():
+        # Some compressed formats report an approximate frame count
+        if position + len(block) > len(samples):
+            samples = np.concatenate([samples, np.empty(len(samples) // 2 + len(block), dtype=np.int16)])
+
+        samples[position:position + len(block)] = block
+        position += len(block)
+
+    return samples[:position], stream.output_rate
@@ -0,0 +1,168 @@
+import socket
+import select
+import threading
+from config import Config
+from logger_config import log_info
+
+
+# Linux TCP states (tcp_info.tcpi_state) once the peer has closed or reset
+# the connection: CLOSE, CLOSE_WAIT, LAST_ACK
+TCP_PEER_CLOSED_STATES = (7, 8, 9)
+
+
+class TranscriptionCancelled(Exception):
+    """Raised between blocks once a transcription's token is cancelled"""
+
+
+class CancellationToken:
+    """
+    Flag a running transcription checks between blocks.
+
+    Set from another thread: the job cancel endpoint, or the watcher
+    that notices the client has gone away. The transcriber stops at its
+    next block and hands its recognizer back to the pool.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason='cancelled'):
+        """Ask the transcription to stop (the first reason given is kept)"""
+
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            TranscriptionCancelled: If cancel() has been called
+        """
+
+        if self._event.is_set():
+            raise TranscriptionCancelled(f"Transcription cancelled ({self.reason})")
+
+
+class CancellationStats:
+    """Process-wide count of cancelled transcriptions per reason"""
+
+    def __init__(self):
+        self.by_reason = {}
+        self._lock = threading.Lock()
+
+    def record(self, reason):
+        with self._lock:
+            self.by_reason[reason] = self.by_reason.get(reason, 0) + 1
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'cancelled': sum(self.by_reason.values()),
+                'by_reason': dict(self.by_reason)
+            }
+
+
+def _client_socket(environ):
+    """The connection's socket, if the WSGI server exposes it"""
+
+    for key in ('gunicorn.socket', 'werkzeug.socket'):
+        sock = environ.get(key)
+        if isinstance(sock, socket.socket):
+            return sock
+
+    return None
+
+
+def _tcp_state(sock):
+    """The connection's TCP state on Linux (None where it can't be read)"""
+
+    if not hasattr(socket, 'TCP_INFO'):
+        return None
+
+    try:
+        return sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 1)[0]
+    except (OSError, ValueError, IndexError):
+        # Not TCP (e.g. a unix socket behind a proxy)
+        return None
+
+
+def _client_gone(sock, body_consumed=True):
+    """
+    True once the client has closed its end of the connection
+
+    The kernel's TCP state shows a close even while unread request body is
+    still buffered. Without it, the socket is peeked instead, which only
+    tells once the body has been read (before that, the next byte is just
+    more body). Any error reading the socket counts as "still there": a
+    false alarm would cancel a healthy request.
+    """
+
+    state = _tcp_state(sock)
+    if state is not None:
+        return state in TCP_PEER_CLOSED_STATES
+
+    if not body_consumed:
+        return False
+
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+
+        # Readable with nothing to read means the peer closed; a pipelined
+        # next request would show up as data instead
+        return sock.recv(1, socket.MSG_PEEK) == b''
+
+    except (OSError, ValueError):
+        # e.g. TLS sockets don't support MSG_PEEK
+        return False
+
+
+class DisconnectWatcher:
+    """
+    Cancels a token when the HTTP client disconnects mid-request.
+
+    WSGI gives a view no disconnect notification, so while the request is
+    being handled a background thread polls the connection's socket every
+    CANCEL_POLL_SECONDS. Does nothing on servers that don't expose the
+    socket. Use as a context manager around the transcription.
+
+    For requests whose body is still being read while the watcher runs,
+    pass `body_consumed` (a callable) so the socket is only peeked once
+    all of the body has been read.
+    """
+
+    def __init__(self, environ, token, poll_seconds=None, body_consumed=None):
+        self.token = token
+        self.poll_seconds = poll_seconds or Config.CANCEL_POLL_SECONDS
+        self.body_consumed = body_consumed or (lambda: True)
+        self._socket = _client_socket(environ)
+        self._done = threading.Event()
+        self._thread = None
+
+    def _watch(self):
+        while not self._done.wait(self.poll_seconds):
+            if _client_gone(self._socket, self.body_consumed()):
+                log_info("Client disconnected, cancelling its transcription")
+                self.token.cancel('client_disconnect')
+                return
+
+    def __enter__(self):
+        if self._socket is not None:
+            self._thread = threading.Thread(target=self._watch, name="disconnect-watcher", daemon=True)
+            self._thread.start()
+        return self.token
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+# Shared by every request in this process
+cancellation_stats = CancellationStats()
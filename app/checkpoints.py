@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from config import Config
+from logger_config import log_info, log_error
+
+
+class TranscriptionCheckpoint:
+    """
+    Progress of one transcription (one recording + one set of settings).
+
+    Holds the finalized text so far and the sample offset (at the rate of
+    the decoded blocks) the recognizer had reached when it was saved. A new
+    checkpoint starts at offset 0 with no text.
+    """
+
+    def __init__(self, store, key, text_parts=None, sample_offset=0, sample_rate=None):
+        self.store = store
+        self.key = key
+        self.text_parts = text_parts or []
+        self.sample_offset = sample_offset
+        self.sample_rate = sample_rate
+
+    @property
+    def offset_seconds(self):
+        return self.sample_offset / self.sample_rate if self.sample_rate else 0.0
+
+    def save(self, text_parts, sample_offset, sample_rate):
+        """Persist progress (called at utterance boundaries)"""
+
+        self.text_parts = list(text_parts)
+        self.sample_offset = int(sample_offset)
+        self.sample_rate = int(sample_rate)
+        self.store.save(self)
+
+    def clear(self):
+        """The transcription finished; nothing to resume"""
+        self.store.delete(self.key)
+
+
+class CheckpointStore:
+    """
+    Checkpoints of long transcriptions (SQLite), so a retry after a crash
+    resumes where the last attempt got to instead of starting over.
+
+    Entries are removed when their transcription finishes; ones left by
+    recordings that were never retried expire after CHECKPOINT_TTL_HOURS.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.CHECKPOINT_PATH
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._counters = {'saves': 0, 'resumes': 0, 'resumed_seconds': 0.0}
+
+    def _connect(self):
+        """Open a connection, creating the table on first use"""
+
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+
+        if not self._initialized:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    checkpoint_key TEXT PRIMARY KEY,
+                    text_parts TEXT NOT NULL,
+                    sample_offset INTEGER NOT NULL,
+                    sample_rate INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            conn.commit()
+            self._initialized = True
+
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def open(self, key):
+        """
+        Load the checkpoint for a key (a fresh one if there is none)
+
+        Returns:
+            TranscriptionCheckpoint
+        """
+
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT text_parts, sample_offset, sample_rate, updated_at FROM checkpoints '
+                'WHERE checkpoint_key = ?', (key,)
+            )
+            row = cursor.fetchone()
+            conn.close()
+
+        except sqlite3.Error as e:
+            log_error(f"Checkpoint lookup failed: {str(e)}", e)
+            row = None
+
+        if row is None or row[3] < time.time() - Config.CHECKPOINT_TTL_HOURS * 3600:
+            return TranscriptionCheckpoint(self, key)
+
+        checkpoint = TranscriptionCheckpoint(self, key, json.loads(row[0]), row[1], row[2])
+
+        self._count('resumes')
+        self._count('resumed_seconds', checkpoint.offset_seconds)
+        log_info(f"Resuming transcription from checkpoint at {checkpoint.offset_seconds:.1f}s")
+
+        return checkpoint
+
+    def save(self, checkpoint):
+        """Write a checkpoint (a failed write only costs resumability)"""
+
+        try:
+            conn = self._connect()
+            conn.execute('''
+                INSERT OR REPLACE INTO checkpoints
+                (checkpoint_key, text_parts, sample_offset, sample_rate, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (checkpoint.key, json.dumps(checkpoint.text_parts), checkpoint.sample_offset,
+                  checkpoint.sample_rate, time.time()))
+            conn.commit()
+            conn.close()
+
+        except sqlite3.Error as e:
+            log_error(f"Checkpoint save failed: {str(e)}", e)
+            return
+
+        self._count('saves')
+
+    def delete(self, key):
+        """Remove a key's checkpoint, plus any that have expired"""
+
+        cutoff = time.time() - Config.CHECKPOINT_TTL_HOURS * 3600
+
+        try:
+            conn = self._connect()
+            conn.execute('DELETE FROM checkpoints WHERE checkpoint_key = ? OR updated_at < ?',
+                         (key, cutoff))
+            conn.commit()
+            conn.close()
+
+        except sqlite3.Error as e:
+            log_error(f"Checkpoint delete failed: {str(e)}", e)
+
+    def get_stats(self):
+        """Saves, resumes and audio seconds skipped by resuming (this process)"""
+
+        with self._lock:
+            stats = dict(self._counters)
+
+        stats['resumed_seconds'] = round(stats['resumed_seconds'], 2)
+
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM checkpoints')
+            stats['pending'] = cursor.fetchone()[0]
+            conn.close()
+        except sqlite3.Error as e:
+            log_error(f"Checkpoint stats failed: {str(e)}", e)
+            stats['pending'] = None
+
+        return stats
+
+
+# Shared by every request in this process
+checkpoint_store = CheckpointStore()
@@ -0,0 +1,285 @@
+import json
+import time
+import shutil
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+from config import Config
+from logger_config import log_info, log_error
+
+
+# Lines of ffmpeg's stderr kept for error messages
+STDERR_LINES = 20
+
+# Sample rate when the caller doesn't ask for one (what the bundled model expects)
+DEFAULT_SAMPLE_RATE = 16000
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg failed, timed out or was cancelled"""
+
+
+def ffmpeg_available():
+    """Check if the ffmpeg binary can be found"""
+    return shutil.which(Config.FFMPEG_PATH) is not None
+
+
+def ffprobe_audio(source):
+    """
+    Header probe through ffprobe, for containers soundfile can't read
+
+    Args:
+        source: Path or in-memory file object
+
+    Returns:
+        Dictionary with duration_seconds (None if the container doesn't
+        record it, e.g. browser webm), sample_rate, channels and format
+
+    Raises:
+        FFmpegError: If ffprobe fails or isn't installed
+    """
+
+    command = [
+        Config.FFPROBE_PATH, '-v', 'error',
+        '-select_streams', 'a:0',
+        '-show_entries', 'format=duration,format_name:stream=sample_rate,channels',
+        '-of', 'json',
+        source if isinstance(source, str) else 'pipe:0'
+    ]
+
+    data = None
+    if not isinstance(source, str):
+        source.seek(0)
+        data = source.read()
+
+    try:
+        result = subprocess.run(command, input=data, capture_output=True,
+                                timeout=Config.FFMPEG_TIMEOUT, check=False)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise FFmpegError(f"ffprobe failed: {str(e)}")
+
+    if result.returncode != 0:
+        raise FFmpegError(f"ffprobe failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+    info = json.loads(result.stdout or b'{}')
+    streams = info.get('streams') or []
+    if not streams:
+        raise FFmpegError("No audio stream found")
+
+    duration = info.get('format', {}).get('duration')
+
+    return {
+        'duration_seconds': round(float(duration), 2) if duration not in (None, 'N/A') else None,
+        'sample_rate': int(streams[0].get('sample_rate', 0)),
+        'channels': int(streams[0].get('channels', 0)),
+        'format': info.get('format', {}).get('format_name', '').split(',')[0].upper()
+    }
+
+
+class FFmpegStream:
+    """
+    Decodes any format ffmpeg knows (m4a, webm/opus...) through a pipe.
+
+    ffmpeg writes mono s16le at `target_rate` to stdout and blocks are
+    read from the pipe as they arrive, so decoding runs alongside
+    recognition and nothing is written to disk. In-memory uploads are fed
+    to ffmpeg's stdin from a thread. Has the same interface as AudioStream.
+
+    Decoding is stopped if ffmpeg produces no output for FFMPEG_TIMEOUT
+    seconds while a block is being waited for (time the consumer spends
+    on a block doesn't count, so long recordings and slow uploads are
+    fine) or by cancel(), and stops on its own once the recording is
+    longer than MAX_AUDIO_DURATION_MINUTES (containers like browser webm
+    don't record their duration, so this can't always be checked up
+    front).
+    """
+
+    def __init__(self, source, block_frames=None, target_rate=None):
+        self.source = source
+        self.block_frames = block_frames or Config.AUDIO_BLOCK_FRAMES
+        self.sample_rate = int(target_rate or DEFAULT_SAMPLE_RATE)
+        self.output_rate = self.sample_rate
+        self.channels = 1
+        self.format = 'FFMPEG'
+        self.subtype = 'PCM_16'
+        self.zero_copy = False
+
+        # Unknown until the pipe is drained
+        self.frames = 0
+
+        self._process = None
+        self._stderr = deque(maxlen=STDERR_LINES)
+        self._cancelled = False
+        self._timed_out = False
+        self._source_error = None
+        self._read_deadline = None
+
+    @property
+    def duration(self):
+        """Seconds decoded so far (the full length once blocks() is done)"""
+        return self.frames / self.sample_rate
+
+    def mapped_samples(self):
+        """Pipes can't be read in place"""
+        return None
+
+    def _command(self, start_frame=0):
+        max_seconds = Config.MAX_AUDIO_DURATION_MINUTES * 60
+        start_seconds = start_frame / self.sample_rate
+
+        return [
+            Config.FFMPEG_PATH, '-hide_banner', '-loglevel', 'error', '-nostats',
+            '-ss', f'{start_seconds:.3f}',
+            '-i', self.source if isinstance(self.source, str) else 'pipe:0',
+            '-vn', '-ac', '1', '-ar', str(self.sample_rate),
+            # A little over the limit, so "too long" can be told apart from "exactly at the limit"
+            '-t', str(max(0, max_seconds + 1 - start_seconds)),
+            '-f', 's16le', '-acodec', 'pcm_s16le', 'pipe:1'
+        ]
+
+    def _feed_stdin(self):
+        """Write an in-memory upload to ffmpeg (runs in a thread)"""
+
+        try:
+            # Request bodies still arriving can only be read once, from where they are
+            if getattr(self.source, 'seekable', lambda: True)():
+                self.source.seek(0)
+
+            while True:
+                try:
+                    chunk = self.source.read(64 * 1024)
+                except Exception as e:
+                    # The upload itself failed (e.g. too big); blocks() raises it
+                    self._source_error = e
+                    self._kill()
+                    break
+
+                if not chunk:
+                    break
+                self._process.stdin.write(chunk)
+
+        except (BrokenPipeError, ValueError, OSError):
+            # ffmpeg exited early (bad input, cancel); the error comes from stderr
+            pass
+        finally:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+
+    def _drain_stderr(self):
+        """Keep the last lines of stderr (and never let the pipe fill up)"""
+        for line in self._process.stderr:
+            self._stderr.append(line.decode('utf-8', 'replace').rstrip())
+
+    def _watch_stalls(self, done):
+        """Kill ffmpeg once a read has waited FFMPEG_TIMEOUT seconds (runs in a thread)"""
+
+        while not done.wait(min(1.0, Config.FFMPEG_TIMEOUT)):
+            deadline = self._read_deadline
+            if deadline is not None and time.monotonic() > deadline:
+                self._on_timeout()
+                return
+
+    def _on_timeout(self):
+        self._timed_out = True
+        self._kill()
+
+    def _kill(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+
+    def cancel(self):
+        """Stop decoding; blocks() raises FFmpegError at the next block"""
+        self._cancelled = True
+        self._kill()
+
+    def stderr_text(self):
+        return '\n'.join(self._stderr)
+
+    def blocks(self, start_frame=0):
+        """
+        Yield mono int16 numpy blocks of up to `block_frames` samples
+
+        The same read buffer is reused for every block, so copy a block
+        if you need to keep it after asking for the next one.
+
+        Args:
+            start_frame: Let ffmpeg seek to this frame first (e.g. to
+                         resume from a checkpoint)
+
+        Raises:
+            FFmpegError: If ffmpeg fails, times out, is cancelled or the
+                         recording is longer than allowed
+        """
+
+        try:
+            self._process = subprocess.Popen(
+                self._command(start_frame),
+                stdin=subprocess.DEVNULL if isinstance(self.source, str) else subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            raise FFmpegError(f"Could not start ffmpeg: {str(e)}")
+
+        helpers = [threading.Thread(target=self._drain_stderr, daemon=True)]
+        if not isinstance(self.source, str):
+            helpers.append(threading.Thread(target=self._feed_stdin, daemon=True))
+        for helper in helpers:
+            helper.start()
+
+        done = threading.Event()
+        watchdog = threading.Thread(target=self._watch_stalls, args=(done,), daemon=True)
+        watchdog.start()
+
+        buffer = bytearray(self.block_frames * 2)
+        max_frames = int(Config.MAX_AUDIO_DURATION_MINUTES * 60 * self.sample_rate)
+        # Counts from the seek point, so duration and the length limit cover the whole recording
+        self.frames = start_frame
+
+        try:
+            while True:
+                # Only time spent waiting on ffmpeg counts towards the timeout
+                self._read_deadline = time.monotonic() + Config.FFMPEG_TIMEOUT
+                size = self._process.stdout.readinto(buffer)
+                self._read_deadline = None
+                if not size:
+                    break
+
+                # Only the very last read can end mid-sample
+                block = np.frombuffer(buffer, dtype='<i2', count=size // 2)
+                self.frames += len(block)
+
+                if self.frames > max_frames:
+                    raise FFmpegError(f"Recording too long. Maximum length: "
+                                      f"{Config.MAX_AUDIO_DURATION_MINUTES} minutes")
+
+                yield block
+
+            returncode = self._process.wait()
+
+        finally:
+            done.set()
+            self._kill()
+            self._process.stdout.close()
+            for helper in helpers:
+                helper.join(timeout=1)
+            watchdog.join()
+            self._process.wait()
+
+        if self._source_error is not None:
+            raise self._source_error
+
+        if self._cancelled:
+            raise FFmpegError("Audio decoding was cancelled")
+
+        if self._timed_out:
+            raise FFmpegError(f"Audio decoding stalled: no output from ffmpeg for {Config.FFMPEG_TIMEOUT}s")
+
+        if returncode != 0:
+            log_error(f"ffmpeg exited with {returncode}: {self.stderr_text()}")
+            raise FFmpegError(f"Could not decode audio: {self._stderr[-1] if self._stderr else 'ffmpeg failed'}")
+
+        log_info(f"ffmpeg decoded {self.duration:.1f}s of audio")
@@ -0,0 +1,214 @@
+import json
+import time
+import secrets
+import threading
+import numpy as np
+from config import Config
+from app.model_registry import model_registry, get_model_sample_rate, resolve_model_path
+from app.recognizer_pool import RecognizerPool
+from app.resampler import Resampler
+from app.audio_stream import as_waveform
+from logger_config import log_info, log_error
+
+
+class LiveSession:
+    """
+    One live recording being transcribed while it is still going on.
+
+    Holds a recognizer from live_recognizer_pool for its whole life; the
+    browser sends raw int16 PCM chunks which are resampled to the model
+    rate (if needed) and fed straight in.
+    """
+
+    def __init__(self, session_id, sample_rate, model_path=None):
+        self.session_id = session_id
+        self.model_path = model_path or Config.VOSK_MODEL_PATH
+        self.sample_rate = int(sample_rate)
+        self.model_rate = get_model_sample_rate(self.model_path)
+
+        self.resampler = None
+        if self.sample_rate != self.model_rate:
+            self.resampler = Resampler(self.sample_rate, self.model_rate)
+
+        # Don't queue behind other live sessions; they can take minutes to finish
+        self.recognizer, self._pool = live_recognizer_pool.acquire(self.model_rate, self.model_path,
+                                                                   timeout=0)
+        self.text_parts = []
+        self.samples_received = 0
+        self.last_active = time.time()
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def _feed(self, samples):
+        """Run samples through the recognizer, collecting finished sentences"""
+
+        if len(samples) == 0:
+            return
+
+        if self.recognizer.AcceptWaveform(as_waveform(samples)):
+            result = json.loads(self.recognizer.Result())
+            if result.get('text'):
+                self.text_parts.append(result['text'])
+
+    def accept_chunk(self, data):
+        """
+        Feed one chunk of little-endian int16 PCM
+
+        Returns:
+            Dictionary with the finalized text so far and the current partial
+        """
+
+        with self.lock:
+            if self.closed:
+                raise ValueError("Live session already finished")
+
+            # Ignore a dangling odd byte rather than failing the whole chunk
+            samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype='<i2')
+            self.samples_received += len(samples)
+            self.last_active = time.time()
+
+            if self.resampler is not None:
+                samples = self.resampler.process(samples)
+
+            self._feed(samples)
+            partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+
+            return {
+                'text': ' '.join(self.text_parts).strip(),
+                'partial': partial,
+                'seconds': round(self.samples_received / self.sample_rate, 2)
+            }
+
+    def finish(self):
+        """
+        Flush the recognizer and give the recognizer back to the pool
+
+        Returns:
+            Full transcript text
+        """
+
+        with self.lock:
+            if self.closed:
+                return ' '.join(self.text_parts).strip()
+
+            flushed = False
+
+            try:
+                if self.resampler is not None:
+                    self._feed(self.resampler.flush())
+
+                final_result = json.loads(self.recognizer.FinalResult())
+                flushed = True
+                if final_result.get('text'):
+                    self.text_parts.append(final_result['text'])
+            finally:
+                # Reset() only clears a recognizer that has been flushed
+                self.close(discard=not flushed)
+
+            return ' '.join(self.text_parts).strip()
+
+    def close(self, discard=False):
+        """Release the recognizer (safe to call more than once)"""
+
+        if self.closed:
+            return
+
+        self.closed = True
+        live_recognizer_pool.release(self.recognizer, self._pool, discard=discard)
+
+
+class LiveSessionManager:
+    """Keeps track of open live sessions and drops abandoned ones"""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or Config.LIVE_SESSION_TIMEOUT
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, sample_rate, model_name=None):
+        """
+        Start a new live session
+
+        Raises:
+            ValueError: If the sample rate or model name is not usable
+            TimeoutError: If LIVE_MAX_SESSIONS sessions are already open
+        """
+
+        self.cleanup()
+
+        sample_rate = int(sample_rate)
+        if not 8000 <= sample_rate <= 192000:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}")
+
+        session_id = secrets.token_hex(8)
+        try:
+            session = LiveSession(session_id, sample_rate, resolve_model_path(model_name))
+        except TimeoutError:
+            raise TimeoutError(f"All {Config.LIVE_MAX_SESSIONS} live transcription slots are in use. "
+                               f"Please try again shortly.")
+
+        with self._lock:
+            self._sessions[session_id] = session
+
+        log_info(f"Live session started: {session_id} ({sample_rate} Hz)")
+        return session
+
+    def get(self, session_id):
+        """Get an open session (None if unknown or expired)"""
+
+        self.cleanup()
+
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def finish(self, session_id):
+        """
+        Finish a session and forget it
+
+        Returns:
+            Transcript text, or None if the session doesn't exist
+        """
+
+        self.cleanup()
+
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+
+        if session is None:
+            return None
+
+        text = session.finish()
+        log_info(f"Live session finished: {session_id} ({len(text)} characters)")
+        return text
+
+    def cleanup(self):
+        """Close sessions that haven't sent audio for `timeout` seconds"""
+
+        cutoff = time.time() - self.timeout
+
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items() if session.last_active < cutoff]
+            sessions = [self._sessions.pop(sid) for sid in expired]
+
+        for session in sessions:
+            try:
+                # Stopped mid-utterance, so its recognizer can't be reused
+                with session.lock:
+                    session.close(discard=True)
+                log_info(f"Live session expired: {session.session_id}")
+            except Exception as e:
+                log_error(f"Failed to close live session: {str(e)}", e)
+
+    def get_stats(self):
+        """Number of open live sessions"""
+        with self._lock:
+            return {'open_sessions': len(self._sessions), 'max_sessions': Config.LIVE_MAX_SESSIONS}
+
+
+# Live sessions hold their recognizer until the recording stops, so they
+# get a pool of their own instead of starving file transcriptions
+live_recognizer_pool = RecognizerPool(max_size=Config.LIVE_MAX_SESSIONS)
+model_registry.add_eviction_listener(live_recognizer_pool.clear)
+
+# Shared by every request in this process
+live_sessions = LiveSessionManager()
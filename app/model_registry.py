@@ -0,0 +1,308 @@
+import os
+import time
+import threading
+from config import Config
+from logger_config import log_info, log_error
+
+
+def get_resident_memory_mb():
+    """
+    Current resident memory (RSS) of this process in MB
+
+    Reads /proc/self/statm on Linux and falls back to the peak RSS
+    reported by the resource module elsewhere.
+    """
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return round(resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux but bytes on macOS
+        divisor = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+        return round(peak / divisor, 1)
+    except Exception:
+        return None
+
+
+def get_model_sample_rate(model_path=None):
+    """
+    Sample rate the model was trained at (from its conf/mfcc.conf)
+
+    Returns:
+        Sample rate in Hz (16000 if the model doesn't say)
+    """
+
+    model_path = model_path or Config.VOSK_MODEL_PATH
+    conf_path = os.path.join(model_path, 'conf', 'mfcc.conf')
+
+    try:
+        with open(conf_path, 'r') as f:
+            for line in f:
+                if line.strip().startswith('--sample-frequency='):
+                    return int(float(line.split('=', 1)[1]))
+    except (OSError, ValueError):
+        pass
+
+    return 16000
+
+
+DEFAULT_MODEL_NAME = 'default'
+
+
+def get_model_paths():
+    """Named models that requests can ask for ('default' is VOSK_MODEL_PATH)"""
+
+    models = {DEFAULT_MODEL_NAME: Config.VOSK_MODEL_PATH}
+    models.update(Config.VOSK_MODELS)
+    return models
+
+
+def resolve_model_path(model_name=None):
+    """
+    Model path for a model name from a request
+
+    Args:
+        model_name: Name from VOSK_MODELS (None or '' means the default model)
+
+    Raises:
+        ValueError: If there is no model with that name
+    """
+
+    if not model_name:
+        return Config.VOSK_MODEL_PATH
+
+    models = get_model_paths()
+
+    if model_name not in models:
+        raise ValueError(f"Unknown speech model: {model_name}. Available: {', '.join(sorted(models))}")
+
+    return models[model_name]
+
+
+def get_directory_size_mb(path):
+    """Size of a model folder on disk in MB"""
+
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+
+    return round(total / (1024 * 1024), 1)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded Vosk models.
+
+    Each model path is loaded once and then shared by every request
+    (vosk.Model is safe to share between recognizers on different threads).
+
+    With a memory budget set, loading a model that takes the loaded models
+    over budget unloads the least recently used other models. Eviction
+    listeners (the recognizer pool) are told, so they drop their
+    references too and the memory is actually freed.
+    """
+
+    def __init__(self, memory_budget_mb=None):
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._eviction_listeners = []
+        self.memory_budget_mb = Config.MODEL_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+
+    def add_eviction_listener(self, listener):
+        """Call listener(model_path) whenever a model is unloaded"""
+        self._eviction_listeners.append(listener)
+
+    def _get_load_lock(self, model_path):
+        """One lock per model so loading one model doesn't block the others"""
+        with self._lock:
+            if model_path not in self._load_locks:
+                self._load_locks[model_path] = threading.Lock()
+            return self._load_locks[model_path]
+
+    def get_model(self, model_path=None):
+        """
+        Get a loaded model, loading it on first use
+
+        Args:
+            model_path: Path to the Vosk model (defaults to Config.VOSK_MODEL_PATH)
+
+        Returns:
+            vosk.Model instance
+        """
+
+        model_path = model_path or Config.VOSK_MODEL_PATH
+
+        model = self._models.get(model_path)
+        if model is not None:
+            self._record_hit(model_path)
+            return model
+
+        with self._get_load_lock(model_path):
+            # Another thread may have finished loading while we waited
+            model = self._models.get(model_path)
+            if model is not None:
+                self._record_hit(model_path)
+                return model
+
+            model = self._load(model_path)
+
+        self._evict_over_budget(keep=model_path)
+        return model
+
+    def _record_hit(self, model_path):
+        stats = self._stats[model_path]
+        stats['hits'] += 1
+        stats['last_used_at'] = time.time()
+
+    def _load(self, model_path):
+        """Load a model from disk and record how long and how much memory it took"""
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Vosk model not found at: {model_path}")
+
+        # Imported here so starting the app doesn't load the native library
+        from vosk import Model
+
+        try:
+            log_info(f"Loading Vosk model from: {model_path}")
+
+            rss_before = get_resident_memory_mb()
+            start = time.perf_counter()
+
+            model = Model(model_path)
+
+            load_seconds = time.perf_counter() - start
+            rss_after = get_resident_memory_mb()
+
+        except Exception as e:
+            log_error(f"Failed to load Vosk model: {str(e)}", e)
+            raise
+
+        memory_mb = None
+        if rss_before is not None and rss_after is not None:
+            memory_mb = round(rss_after - rss_before, 1)
+
+        # RSS growth is unreliable if another model was loading at the same
+        # time; the size on disk is a fair stand-in for the budget
+        budget_mb = memory_mb
+        if not budget_mb or budget_mb <= 0:
+            budget_mb = get_directory_size_mb(model_path)
+
+        previous = self._stats.get(model_path, {})
+        now = time.time()
+
+        with self._lock:
+            self._models[model_path] = model
+            self._stats[model_path] = {
+                'model_path': model_path,
+                'loaded': True,
+                'load_seconds': round(load_seconds, 3),
+                'memory_mb': memory_mb,
+                'budget_mb': budget_mb,
+                'process_rss_mb': rss_after,
+                'loaded_at': now,
+                'last_used_at': now,
+                'loads': previous.get('loads', 0) + 1,
+                'hits': 0,
+                'evictions': previous.get('evictions', 0)
+            }
+
+        log_info(f"✅ Vosk model loaded in {load_seconds:.2f}s "
+                 f"(+{memory_mb} MB, process RSS {rss_after} MB)")
+        return model
+
+    def reload(self, model_path=None):
+        """
+        Force a model to be loaded again from disk (e.g. after replacing files)
+
+        Requests already holding the old model keep using it until they finish.
+        """
+
+        model_path = model_path or Config.VOSK_MODEL_PATH
+
+        with self._get_load_lock(model_path):
+            log_info(f"Reloading Vosk model: {model_path}")
+            model = self._load(model_path)
+
+        self._evict_over_budget(keep=model_path)
+        return model
+
+    def _evict_over_budget(self, keep):
+        """Unload least recently used models (never `keep`) until within budget"""
+
+        if not self.memory_budget_mb:
+            return
+
+        evicted = []
+
+        with self._lock:
+            loaded = sorted(self._models, key=lambda path: self._stats[path]['last_used_at'])
+            total_mb = sum(self._stats[path]['budget_mb'] for path in loaded)
+
+            for model_path in loaded:
+                if total_mb <= self.memory_budget_mb:
+                    break
+                if model_path == keep:
+                    continue
+
+                del self._models[model_path]
+                stats = self._stats[model_path]
+                stats['loaded'] = False
+                stats['evictions'] += 1
+                total_mb -= stats['budget_mb']
+                evicted.append(model_path)
+
+        for model_path in evicted:
+            log_info(f"Unloaded Vosk model {model_path} (memory budget {self.memory_budget_mb} MB)")
+            for listener in self._eviction_listeners:
+                try:
+                    listener(model_path)
+                except Exception as e:
+                    log_error(f"Model eviction listener failed: {str(e)}", e)
+
+        if total_mb > self.memory_budget_mb:
+            log_error(f"Loaded models use {total_mb:.0f} MB, over the "
+                      f"{self.memory_budget_mb} MB budget")
+
+    def is_loaded(self, model_path=None):
+        """Check if a model is already in memory"""
+        return (model_path or Config.VOSK_MODEL_PATH) in self._models
+
+    def get_stats(self):
+        """
+        Get load statistics for every model in the registry
+
+        Returns:
+            Dictionary with per-model stats and current process RSS
+        """
+
+        names = {path: name for name, path in get_model_paths().items()}
+
+        with self._lock:
+            models = [dict(stats) for stats in self._stats.values()]
+
+        for stats in models:
+            stats['name'] = names.get(stats['model_path'])
+
+        return {
+            'models': models,
+            'loaded_mb': round(sum(stats['budget_mb'] for stats in models if stats['loaded']), 1),
+            'memory_budget_mb': self.memory_budget_mb or None,
+            'process_rss_mb': get_resident_memory_mb()
+        }
+
+
+# Shared by every transcriber in this process
+model_registry = ModelRegistry()
@@ -0,0 +1,430 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from config import Config
+from app.audio_handler import VoskTranscriber
+from app.audio_features import frame_rms, smooth
+from app.audio_stream import load_mono_int16, as_waveform, describe_source, probe_audio
+from app.model_registry import model_registry, get_model_sample_rate
+from app.recognizer_pool import recognizer_pool
+from app.vad import VoiceActivityDetector
+from app.shared_audio import SharedSamples, decode_shared_range, start_resource_tracker
+from app.cancellation import TranscriptionCancelled
+from logger_config import log_info, log_error
+
+
+# Frame size used when looking for pauses to split at
+SPLIT_FRAME_MS = 30
+
+# Energy is averaged over this many frames so we cut in the middle of a
+# pause rather than in a tiny gap between two words
+SPLIT_SMOOTHING_FRAMES = 10
+
+
+def find_split_points(samples, sample_rate, min_segment_seconds):
+    """
+    Pick cut points at the quietest moment after each `min_segment_seconds`
+
+    After a segment reaches the minimum length we look ahead half a
+    segment more and cut at the lowest (smoothed) energy in that window.
+
+    Returns:
+        List of sample offsets to cut at (not including 0 or the end)
+    """
+
+    frame_length = int(sample_rate * SPLIT_FRAME_MS / 1000)
+    energy = smooth(frame_rms(samples, frame_length), SPLIT_SMOOTHING_FRAMES)
+
+    n_frames = len(energy)
+    min_frames = max(1, int(min_segment_seconds * 1000 / SPLIT_FRAME_MS))
+    window = max(1, min_frames // 2)
+
+    cuts = []
+    position = 0
+
+    # Stop once what's left would be shorter than a minimum segment
+    while position + min_frames + window < n_frames:
+        low = position + min_frames
+        high = low + window
+        cut = low + int(np.argmin(energy[low:high]))
+        cuts.append(cut * frame_length)
+        position = cut
+
+    return cuts
+
+
+def plan_segments(total_samples, cuts, sample_rate, overlap_seconds):
+    """
+    Turn cut points into overlapping segments
+
+    Each segment owns the "core" range between two cuts; the decoded range
+    is widened by `overlap_seconds` on each side so words cut at the
+    boundary are still recognized in full by one of the neighbours.
+
+    Returns:
+        List of dicts with core_start/core_end and start/end sample offsets
+    """
+
+    overlap = int(overlap_seconds * sample_rate)
+    bounds = [0] + list(cuts) + [total_samples]
+
+    segments = []
+    for index in range(len(bounds) - 1):
+        core_start, core_end = bounds[index], bounds[index + 1]
+        segments.append({
+            'index': index,
+            'core_start': core_start,
+            'core_end': core_end,
+            'start': max(0, core_start - overlap),
+            'end': min(total_samples, core_end + overlap)
+        })
+
+    return segments
+
+
+def decode_utterances(samples, sample_rate, model_path, offset_seconds=0.0, block_frames=4000,
+                      cancel_token=None):
+    """
+    Run one recognizer over an int16 array and return its words per utterance
+
+    Vosk ends an utterance at each pause (every Result() call), so these
+    are roughly the spoken phrases of the recording. `cancel_token` is
+    checked between blocks.
+
+    Returns:
+        List of utterances, each a list of word dicts (word, start, end,
+        conf) with times in seconds relative to the whole recording
+    """
+
+    utterances = []
+
+    def collect(result_json):
+        result = json.loads(result_json)
+        words = [
+            {
+                'word': word['word'],
+                'start': word['start'] + offset_seconds,
+                'end': word['end'] + offset_seconds,
+                'conf': word.get('conf', 1.0)
+            }
+            for word in result.get('result', [])
+        ]
+        if words:
+            utterances.append(words)
+
+    with recognizer_pool.recognizer(sample_rate, model_path) as rec:
+        for position in range(0, len(samples), block_frames):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
+            if rec.AcceptWaveform(as_waveform(samples[position:position + block_frames])):
+                collect(rec.Result())
+
+        collect(rec.FinalResult())
+
+    return utterances
+
+
+def decode_samples(samples, sample_rate, model_path, offset_seconds=0.0, block_frames=4000,
+                   cancel_token=None):
+    """
+    Run one recognizer over an int16 array and return its words
+
+    Returns:
+        List of word dicts (word, start, end, conf) with times in seconds
+        relative to the whole recording
+    """
+
+    utterances = decode_utterances(samples, sample_rate, model_path, offset_seconds, block_frames,
+                                   cancel_token)
+    return [word for words in utterances for word in words]
+
+
+def stitch_segments(segments, segment_words, sample_rate):
+    """
+    Merge per-segment words in order, dropping duplicates from the overlaps
+
+    A word is kept only by the segment whose core range contains the
+    middle of the word, so a word decoded twice in an overlap appears once.
+
+    Returns:
+        List of word dicts in time order
+    """
+
+    merged = []
+
+    for segment, words in zip(segments, segment_words):
+        core_start = segment['core_start'] / sample_rate
+        core_end = segment['core_end'] / sample_rate
+
+        for word in words:
+            middle = (word['start'] + word['end']) / 2
+            if core_start <= middle < core_end:
+                merged.append(word)
+
+    merged.sort(key=lambda word: word['start'])
+    return merged
+
+
+def _init_worker(model_path):
+    """Load the model once when a worker process starts"""
+    model_registry.get_model(model_path)
+
+
+def _decode_segment(model_path, handle, start, end, sample_rate):
+    """Runs inside a worker process; reads its range straight from shared memory"""
+    return decode_shared_range(handle, start, end, decode_samples,
+                               sample_rate, model_path, start / sample_rate)
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers, model_path):
+    """
+    Get (or start) a process pool for a worker count and model
+
+    Pools are kept for the life of the process so each worker only loads
+    the model once, not once per recording.
+    """
+
+    key = (workers, model_path)
+
+    with _executors_lock:
+        if key not in _executors:
+            log_info(f"Starting transcription process pool ({workers} workers)")
+            start_resource_tracker()
+            _executors[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(model_path,)
+            )
+        return _executors[key]
+
+
+def discard_executor(workers, model_path):
+    """Drop a pool whose worker died, so the next recording starts a fresh one"""
+
+    with _executors_lock:
+        executor = _executors.pop((workers, model_path), None)
+
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ParallelVoskTranscriber(VoskTranscriber):
+    """
+    Vosk transcription that splits long recordings at pauses and decodes
+    the segments on several CPU cores at once
+    """
+
+    # Segments finish out of order, so there's no single offset to resume from
+    supports_checkpoints = False
+
+    def __init__(self, model_path=None, workers=None, min_segment_seconds=None,
+                 overlap_seconds=None):
+        super().__init__(model_path)
+        self.workers = workers or Config.PARALLEL_WORKERS
+        self.min_segment_seconds = min_segment_seconds or Config.PARALLEL_MIN_SEGMENT_SECONDS
+        self.overlap_seconds = Config.PARALLEL_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+
+    def _too_short(self, duration):
+        """True if a recording is too short to split (False if the duration is unknown)"""
+        return duration is not None and duration < 2 * self.min_segment_seconds
+
+    def _header_duration(self, audio_path):
+        """Duration from the file header, or None if it doesn't record one"""
+
+        try:
+            return probe_audio(audio_path)['duration_seconds']
+        except Exception:
+            # Decoding reports the real problem
+            return None
+
+    def transcribe(self, audio_path, cancel_token=None, checkpoint=None):
+        """
+        Transcribe audio file, in parallel when it is long enough to be worth it
+
+        Args:
+            audio_path: Path to audio file
+            cancel_token: Optional CancellationToken; queued segments are
+                          dropped once it is cancelled (segments already
+                          in a worker run to their end)
+
+        Returns:
+            Transcribed text string
+        """
+
+        try:
+            # Not worth the process hand-off for short clips. Decide from the
+            # header where possible, so the serial path is the only decode
+            if self.workers < 2 or self._too_short(self._header_duration(audio_path)):
+                return super().transcribe(audio_path, cancel_token, checkpoint)
+
+            decode_start = time.perf_counter()
+            samples, sample_rate = load_mono_int16(audio_path, self.target_rate)
+            decode_seconds = time.perf_counter() - decode_start
+            duration = len(samples) / sample_rate
+
+            # Containers without a recorded duration (browser webm) only tell after decoding
+            if self._too_short(duration):
+                return super().transcribe(audio_path, cancel_token, checkpoint)
+
+            log_info(f"Starting parallel transcription: {describe_source(audio_path)} "
+                     f"({duration:.0f}s, {self.workers} workers)")
+
+            # Optionally drop silence first; word times are mapped back afterwards
+            vad = None
+            if Config.VAD_ENABLED:
+                vad = VoiceActivityDetector(sample_rate)
+                speech = list(vad.filter(
+                    samples[i:i + Config.AUDIO_BLOCK_FRAMES]
+                    for i in range(0, len(samples), Config.AUDIO_BLOCK_FRAMES)
+                ))
+                samples = np.concatenate(speech) if speech else np.empty(0, dtype=np.int16)
+
+            words, stats = self.transcribe_samples(samples, sample_rate, cancel_token)
+            stats['stages'] = {'decode': round(decode_seconds, 4)}
+
+            if vad is not None:
+                for word in words:
+                    word['start'] = vad.to_original_time(word['start'])
+                    word['end'] = vad.to_original_time(word['end'])
+                stats['vad'] = vad.get_stats()
+                stats['audio_seconds'] = round(duration, 2)
+                log_info(f"VAD skipped {stats['vad']['skipped_fraction']:.1%} of the audio")
+
+            full_text = ' '.join(word['word'] for word in words).strip()
+
+            self.last_run = stats
+            log_info(f"✅ Parallel transcription complete: {len(full_text)} characters, "
+                     f"{stats['segments']} segments in {stats['seconds']}s")
+            return full_text
+
+        except TranscriptionCancelled:
+            log_info(f"Transcription stopped: {cancel_token.reason}")
+            raise
+
+        except Exception as e:
+            log_error(f"Parallel transcription failed: {str(e)}", e)
+            raise
+
+    def transcribe_samples(self, samples, sample_rate, cancel_token=None):
+        """
+        Split, decode in the process pool and stitch an int16 array
+
+        Returns:
+            tuple: (words, stats)
+        """
+
+        start_time = time.perf_counter()
+
+        cuts = find_split_points(samples, sample_rate, self.min_segment_seconds)
+        segments = plan_segments(len(samples), cuts, sample_rate, self.overlap_seconds)
+
+        executor = get_executor(self.workers, self.model_path)
+
+        # Workers read their ranges from one shared copy instead of each
+        # getting a pickled slice; the segment is removed however this ends
+        with SharedSamples(samples) as shared:
+            futures = []
+
+            try:
+                for segment in segments:
+                    futures.append(executor.submit(
+                        _decode_segment,
+                        self.model_path,
+                        shared.handle,
+                        segment['start'],
+                        segment['end'],
+                        sample_rate
+                    ))
+
+                pending = futures
+                while pending:
+                    _, pending = wait(pending, timeout=Config.CANCEL_POLL_SECONDS)
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
+
+                segment_words = [future.result() for future in futures]
+
+            except Exception as e:
+                # The rest is pointless now; segments already being decoded
+                # keep their mapping when the shared segment is removed
+                for future in futures:
+                    future.cancel()
+
+                if isinstance(e, BrokenProcessPool):
+                    log_error("A transcription worker died; restarting the process pool")
+                    discard_executor(self.workers, self.model_path)
+                raise
+
+        words = stitch_segments(segments, segment_words, sample_rate)
+
+        seconds = time.perf_counter() - start_time
+        duration = len(samples) / sample_rate
+
+        stats = {
+            'mode': 'parallel',
+            'workers': self.workers,
+            'segments': len(segments),
+            'audio_seconds': round(duration, 2),
+            'seconds': round(seconds, 3),
+            'real_time_factor': round(seconds / duration, 4) if duration else None
+        }
+
+        return words, stats
+
+
+def speedup_report(audio_path, worker_counts=None, min_segment_seconds=None,
+                   overlap_seconds=None, model_path=None):
+    """
+    Time the serial path against the parallel path for several worker counts
+
+    Process pools are started (and their models loaded) before timing,
+    so the numbers show steady-state decode speed.
+
+    Returns:
+        Dictionary with serial timing and one entry per worker count
+    """
+
+    model_path = model_path or Config.VOSK_MODEL_PATH
+    worker_counts = worker_counts or [2, 4, os.cpu_count() or 1]
+
+    target_rate = get_model_sample_rate(model_path) if Config.RESAMPLE_TO_MODEL_RATE else None
+    samples, sample_rate = load_mono_int16(audio_path, target_rate)
+    duration = len(samples) / sample_rate
+
+    start = time.perf_counter()
+    serial_words = decode_samples(samples, sample_rate, model_path)
+    serial_seconds = time.perf_counter() - start
+
+    report = {
+        'audio_path': audio_path,
+        'audio_seconds': round(duration, 2),
+        'serial': {
+            'seconds': round(serial_seconds, 3),
+            'real_time_factor': round(serial_seconds / duration, 4) if duration else None,
+            'words': len(serial_words)
+        },
+        'parallel': []
+    }
+
+    for workers in sorted(set(worker_counts)):
+        transcriber = ParallelVoskTranscriber(model_path, workers, min_segment_seconds, overlap_seconds)
+
+        # Warm the pool so worker start-up isn't counted
+        executor = get_executor(workers, model_path)
+        list(executor.map(_init_worker, [model_path] * workers))
+
+        words, stats = transcriber.transcribe_samples(samples, sample_rate)
+        stats['words'] = len(words)
+        stats['speedup'] = round(serial_seconds / stats['seconds'], 2) if stats['seconds'] else None
+        report['parallel'].append(stats)
+
+    return report
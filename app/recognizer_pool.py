@@ -0,0 +1,219 @@
+import time
+import threading
+from contextlib import contextmanager
+from config import Config
+from app.model_registry import model_registry
+from logger_config import log_info, log_error
+
+
+class _KeyPool:
+    """Idle recognizers for one (model, sample rate, SetWords) combination"""
+
+    def __init__(self, key, model, max_size):
+        self.key = key
+        self.model = model
+        self.max_size = max_size
+        self.idle = []
+        self.total = 0
+        self.condition = threading.Condition()
+
+
+class RecognizerPool:
+    """
+    Bounded pool of reusable KaldiRecognizer objects.
+
+    Creating a recognizer allocates decoder state for the model, so instead
+    of building one per file we keep up to `max_size` per
+    (model, sample rate, SetWords flag) and Reset() them between requests.
+
+    Reset() only leaves a recognizer as good as new once FinalResult() has
+    been called; one given back mid-utterance carries decoder state into
+    the next file, so it has to be released with discard=True (a new one
+    is created on the next checkout). Transcripts still vary slightly from
+    run to run unless the model's conf/mfcc.conf sets --dither=0, since
+    Kaldi adds random dither to the audio features.
+    """
+
+    def __init__(self, max_size=None, checkout_timeout=None):
+        self.max_size = max_size or Config.RECOGNIZER_POOL_SIZE
+        self.checkout_timeout = checkout_timeout or Config.RECOGNIZER_CHECKOUT_TIMEOUT
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            'checkouts': 0,
+            'created': 0,
+            'reused': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'wait_seconds': 0.0
+        }
+
+    def _get_key_pool(self, key, model):
+        """Get the pool for a key, replacing it if the model was reloaded"""
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None or pool.model is not model:
+                pool = _KeyPool(key, model, self.max_size)
+                self._pools[key] = pool
+            return pool
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._metrics[name] += amount
+
+    def acquire(self, sample_rate, model_path=None, words=True, timeout=None):
+        """
+        Check out a recognizer, waiting up to `timeout` seconds if all are busy
+
+        Returns:
+            tuple: (recognizer, pool) - pass both back to release()
+
+        Raises:
+            TimeoutError: If no recognizer became free in time
+        """
+
+        model_path = model_path or Config.VOSK_MODEL_PATH
+        timeout = self.checkout_timeout if timeout is None else timeout
+
+        model = model_registry.get_model(model_path)
+        key = (model_path, int(sample_rate), bool(words))
+        pool = self._get_key_pool(key, model)
+
+        self._count('checkouts')
+
+        with pool.condition:
+            if not pool.idle and pool.total >= pool.max_size:
+                self._count('waits')
+                start = time.perf_counter()
+                got_one = pool.condition.wait_for(
+                    lambda: pool.idle or pool.total < pool.max_size,
+                    timeout=timeout
+                )
+                self._count('wait_seconds', time.perf_counter() - start)
+
+                if not got_one:
+                    self._count('timeouts')
+                    log_error(f"Recognizer pool exhausted for {key} "
+                              f"({pool.max_size} in use, waited {timeout}s)")
+                    raise TimeoutError("All speech recognizers are busy. Please try again shortly.")
+
+            if pool.idle:
+                self._count('reused')
+                return pool.idle.pop(), pool
+
+            pool.total += 1
+
+        from vosk import KaldiRecognizer
+
+        try:
+            recognizer = KaldiRecognizer(model, int(sample_rate))
+            recognizer.SetWords(bool(words))
+        except Exception:
+            with pool.condition:
+                pool.total -= 1
+                pool.condition.notify()
+            raise
+
+        self._count('created')
+        return recognizer, pool
+
+    def release(self, recognizer, pool, discard=False):
+        """
+        Return a recognizer to its pool
+
+        Args:
+            discard: Drop the recognizer instead of reusing it (e.g. after
+                     an error, or when FinalResult() wasn't called)
+        """
+
+        # The model was reloaded (or the pool cleared) while this was checked out
+        with self._lock:
+            if self._pools.get(pool.key) is not pool:
+                discard = True
+
+        if not discard:
+            try:
+                recognizer.Reset()
+            except Exception as e:
+                log_error(f"Recognizer reset failed: {str(e)}", e)
+                discard = True
+
+        with pool.condition:
+            if discard:
+                pool.total -= 1
+                self._count('discarded')
+            else:
+                pool.idle.append(recognizer)
+            pool.condition.notify()
+
+    @contextmanager
+    def recognizer(self, sample_rate, model_path=None, words=True, timeout=None):
+        """
+        Context manager around acquire()/release()
+
+        Usage:
+            with recognizer_pool.recognizer(16000) as rec:
+                rec.AcceptWaveform(data)
+        """
+
+        recognizer, pool = self.acquire(sample_rate, model_path, words, timeout)
+        failed = False
+
+        try:
+            yield recognizer
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.release(recognizer, pool, discard=failed)
+
+    def clear(self, model_path=None):
+        """
+        Drop idle recognizers (checked-out ones are dropped on release)
+
+        Args:
+            model_path: Only drop recognizers for this model (default: all)
+        """
+
+        with self._lock:
+            if model_path is None:
+                self._pools = {}
+            else:
+                self._pools = {key: pool for key, pool in self._pools.items() if key[0] != model_path}
+
+        log_info(f"Recognizer pool cleared{f' for {model_path}' if model_path else ''}")
+
+    def get_stats(self):
+        """
+        Get pool usage metrics
+
+        Returns:
+            Dictionary with counters and per-key idle/in-use numbers
+        """
+
+        with self._lock:
+            metrics = dict(self._metrics)
+            pools = [
+                {
+                    'model_path': key[0],
+                    'sample_rate': key[1],
+                    'words': key[2],
+                    'size': pool.total,
+                    'idle': len(pool.idle),
+                    'in_use': pool.total - len(pool.idle),
+                    'max_size': pool.max_size
+                }
+                for key, pool in self._pools.items()
+            ]
+
+        metrics['wait_seconds'] = round(metrics['wait_seconds'], 3)
+        metrics['pools'] = pools
+        return metrics
+
+
+# Shared by every transcriber in this process
+recognizer_pool = RecognizerPool()
+
+# Recognizers keep their model alive, so unloading a model must drop them too
+model_registry.add_eviction_listener(recognizer_pool.clear)
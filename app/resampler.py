@@ -0,0 +1,199 @@
+from fractions import Fraction
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Sinc zero crossings kept on each side of the filter centre
+FILTER_ZERO_CROSSINGS = 16
+
+# Cutoff as a fraction of the lower Nyquist frequency (leaves room for the transition band)
+FILTER_ROLLOFF = 0.92
+
+# Kaiser window shape (~80 dB stopband)
+FILTER_KAISER_BETA = 8.6
+
+# Output periods computed per matrix product
+PERIODS_PER_STEP = 1024
+
+# Largest up/down factor used. The filter and matrix grow with it (an odd
+# rate like 47999 -> 16000 Hz would need gigabytes), so bigger ratios are
+# snapped to the nearest fraction within the limit; the rate error stays
+# far below anything audible. Every common rate pair fits unchanged.
+MAX_RATIO_TERM = 1000
+
+
+def rational_ratio(source_rate, target_rate, limit=MAX_RATIO_TERM):
+    """
+    Resampling ratio as (up, down), both at most `limit`
+
+    Raises:
+        ValueError: If a rate isn't positive or the ratio is too extreme
+    """
+
+    if source_rate <= 0 or target_rate <= 0:
+        raise ValueError(f"Invalid sample rates: {source_rate} -> {target_rate}")
+
+    ratio = Fraction(target_rate, source_rate)
+
+    if max(ratio.numerator, ratio.denominator) > limit:
+        # limit_denominator bounds the denominator, so bound the bigger term
+        inverted = ratio > 1
+        if inverted:
+            ratio = 1 / ratio
+
+        ratio = ratio.limit_denominator(limit)
+        if ratio.numerator == 0:
+            raise ValueError(f"Unsupported resampling ratio: {source_rate} -> {target_rate}")
+
+        if inverted:
+            ratio = 1 / ratio
+
+    return ratio.numerator, ratio.denominator
+
+
+def design_polyphase_filter(up, down):
+    """
+    Windowed-sinc low-pass filter split into `up` polyphase branches
+
+    Returns:
+        tuple: (bank, delay) - bank is a float32 (up, taps) array where
+        bank[p, k] = h[p + k * up]; delay is the filter centre in
+        upsampled samples
+    """
+
+    factor = max(up, down)
+    cutoff = 0.5 * FILTER_ROLLOFF / factor
+    length = 2 * FILTER_ZERO_CROSSINGS * factor + 1
+    delay = (length - 1) // 2
+
+    n = np.arange(length) - delay
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, FILTER_KAISER_BETA)
+
+    # Zero stuffing divides the signal energy by `up`, so put it back
+    h *= up / h.sum()
+
+    taps = -(-length // up)
+    padded = np.zeros(taps * up)
+    padded[:length] = h
+
+    bank = padded.reshape(taps, up).T.astype(np.float32)
+    return np.ascontiguousarray(bank), delay
+
+
+class Resampler:
+    """
+    Streaming polyphase resampler for int16 audio.
+
+    Converts source_rate -> target_rate by the rational factor up/down
+    (snapped to terms of at most MAX_RATIO_TERM, see rational_ratio).
+    The filter phases repeat every `up` output samples (one "period",
+    which consumes exactly `down` input samples), so the polyphase bank is
+    laid out once as an (up, span) matrix and every period of output is a
+    single row of one numpy matrix product. Call process() for every block
+    and flush() once at the end.
+    """
+
+    def __init__(self, source_rate, target_rate):
+        self.source_rate = int(source_rate)
+        self.target_rate = int(target_rate)
+        self.up, self.down = rational_ratio(self.source_rate, self.target_rate)
+
+        bank, delay = design_polyphase_filter(self.up, self.down)
+        taps = bank.shape[1]
+
+        # Output r of a period reads input (period * down + newest[r] - k) with branch phase[r]
+        position = np.arange(self.up) * self.down + delay
+        newest = position // self.up
+        phase = position - newest * self.up
+
+        # Input window of period 0 relative to the start of the stream
+        self._offset = int(newest.min()) - (taps - 1)
+        self._span = int(newest.max()) - self._offset + 1
+
+        self._matrix = np.zeros((self._span, self.up), dtype=np.float32)
+        for r in range(self.up):
+            rows = newest[r] - np.arange(taps) - self._offset
+            self._matrix[rows, r] = bank[phase[r]]
+
+        # Samples before the start of the stream count as silence
+        self._buffer_start = min(self._offset, 0)
+        self._buffer = np.zeros(-self._buffer_start, dtype=np.float32)
+        self._input_count = 0
+        self._next_period = 0
+
+    def process(self, block):
+        """
+        Resample the next block of int16 samples
+
+        Returns:
+            int16 numpy array (may be empty while the filter fills up)
+        """
+
+        if len(block):
+            self._buffer = np.concatenate([self._buffer, block.astype(np.float32)])
+            self._input_count += len(block)
+
+        return self._emit()
+
+    def flush(self):
+        """
+        Produce the remaining output once the input has ended
+
+        Pads with silence so the total output is exactly
+        ceil(input_samples * target_rate / source_rate).
+        """
+
+        total = -(-self._input_count * self.up // self.down)
+        produced = self._next_period * self.up
+        if total <= produced:
+            return np.empty(0, dtype=np.int16)
+
+        periods = -(-total // self.up)
+        last_needed = (periods - 1) * self.down + self._offset + self._span - 1
+        buffer_end = self._buffer_start + len(self._buffer) - 1
+        if last_needed > buffer_end:
+            padding = np.zeros(last_needed - buffer_end, dtype=np.float32)
+            self._buffer = np.concatenate([self._buffer, padding])
+
+        return self._emit()[:total - produced]
+
+    def _emit(self):
+        """Compute every period whose input window is complete"""
+
+        buffer_end = self._buffer_start + len(self._buffer)
+        end = (buffer_end - self._offset - self._span) // self.down + 1
+
+        if end <= self._next_period:
+            return np.empty(0, dtype=np.int16)
+
+        first = self._next_period * self.down + self._offset - self._buffer_start
+        count = end - self._next_period
+
+        # One row per period, stepping `down` samples through the buffer (no copy)
+        windows = sliding_window_view(self._buffer[first:], self._span)[::self.down][:count]
+        output = np.empty((count, self.up), dtype=np.float32)
+
+        # Bounded steps keep the temporary float arrays small for big blocks
+        for start in range(0, count, PERIODS_PER_STEP):
+            stop = min(start + PERIODS_PER_STEP, count)
+            np.matmul(windows[start:stop], self._matrix, out=output[start:stop])
+
+        self._next_period = end
+
+        # Forget input that no future period will look at
+        drop = end * self.down + self._offset - self._buffer_start
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_start += drop
+
+        return np.clip(np.rint(output.ravel()), -32768, 32767).astype(np.int16)
+
+
+def resample(samples, source_rate, target_rate):
+    """Resample a whole int16 array in one go"""
+
+    if source_rate == target_rate:
+        return samples
+
+    resampler = Resampler(source_rate, target_rate)
+    return np.concatenate([resampler.process(samples), resampler.flush()])
@@ -1,12 +1,23 @@
 from flask import render_template, request, send_file, flash, redirect, url_for
 from app import app
 from app.ollama_handler import send_to_ollama, validate_meeting_data
-from app.pdf_generator import generate_pdf
 from config import Config
 from logger_config import log_info, log_error, log_request, log_report_generation
 import os
 from database import add_meeting, get_all_meetings, search_meetings, delete_meeting, get_database_stats
-from app.audio_handler import transcribe_audio, validate_audio_file, save_uploaded_audio, cleanup_audio_file
+from app.audio_handler import transcribe_audio, validate_audio_file, probe_audio_file, check_audio_quality, load_uploaded_audio, cleanup_audio_file, get_upload_hash
+from app.model_registry import model_registry, get_model_paths, resolve_model_path
+from app.audio_stream import describe_source
+from app.recognizer_pool import recognizer_pool
+from app.transcript_cache import transcript_cache
+from app.live_transcriber import live_sessions
+from app.transcription_jobs import transcription_jobs
+from app.warmup import readiness, start_warmup
+from app.two_pass_transcriber import redecode_stats
+from app.stream_ingest import IncomingUpload, UploadError, probe_incoming
+from app.cancellation import CancellationToken, DisconnectWatcher, TranscriptionCancelled, cancellation_stats
+from app.checkpoints import checkpoint_store
+from app.audio_quality import quality_stats
 
 
 def validate_meeting_input(text):
@@ -101,7 +112,9 @@ def create_meeting():
         log_request('/create', 'POST', 400)
         return redirect(url_for('create_meeting'))
     
-    # Generate PDF
+    # Generate PDF (reportlab is slow to import, so it's loaded on the first report)
+    from app.pdf_generator import generate_pdf
+    
     filename = f"meeting_report_{os.urandom(8).hex()}.pdf"
     pdf_path, error = generate_pdf(meeting_data, filename)
     
@@ -244,15 +257,42 @@ def transcribe():
         log_error(f"Audio validation failed: {error_msg}")
         return {'success': False, 'error': error_msg}, 400
     
-    filepath = None
+    # Reject overlong recordings from the header, before decoding anything
+    audio_info, error_msg = probe_audio_file(file)
+    if error_msg:
+        log_error(f"Audio rejected: {error_msg}")
+        return {'success': False, 'error': error_msg}, 400
+    
+    # A quick look at the signal catches recordings that would only decode to nothing
+    _, error_msg = check_audio_quality(file)
+    if error_msg:
+        return {'success': False, 'error': error_msg}, 400
+    
+    model_name = request.form.get('model')
+    try:
+        resolve_model_path(model_name)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    audio_source = None
     
     try:
-        # Save uploaded file
-        filepath = save_uploaded_audio(file)
-        log_info(f"Processing audio file: {filepath}")
+        # Hash was computed while the upload arrived (used for the transcript cache)
+        audio_hash = get_upload_hash(file)
         
-        # Transcribe
-        text, error = transcribe_audio(filepath)
+        # Keep small uploads in memory, save big ones to disk
+        audio_source = load_uploaded_audio(file)
+        log_info(f"Processing audio file: {describe_source(audio_source)}")
+        
+        # Transcribe (stopped early if the client goes away)
+        with DisconnectWatcher(request.environ, CancellationToken()) as cancel_token:
+            text, error = transcribe_audio(audio_source, audio_hash, model_name, cancel_token)
+        
+        # Nobody is left to read the response; 499 as in nginx's "client closed request"
+        if error and cancel_token.cancelled:
+            log_info(f"Transcription abandoned: {cancel_token.reason}")
+            log_request('/transcribe', 'POST', 499)
+            return {'success': False, 'error': error}, 499
         
         if error:
             log_error(f"Transcription failed: {error}")
@@ -272,8 +312,308 @@ def transcribe():
         
     finally:
         # Cleanup
-        if filepath:
-            cleanup_audio_file(filepath)
+        if audio_source:
+            cleanup_audio_file(audio_source)
+
+
+@app.route('/transcribe/stream', methods=['POST'])
+def transcribe_stream():
+    """
+    Transcribe a recording sent as the raw request body
+    
+    Decoding starts with the first bytes, so the transcript is ready
+    shortly after the upload finishes instead of a whole decode later.
+    e.g. curl --data-binary @meeting.wav "/transcribe/stream?model=en-large"
+    """
+    
+    log_info("Streamed audio transcription requested")
+    
+    max_size = Config.MAX_AUDIO_SIZE_MB * 1024 * 1024
+    
+    if request.content_length is not None:
+        if request.content_length == 0:
+            log_request('/transcribe/stream', 'POST', 400)
+            return {'success': False, 'error': 'File is empty'}, 400
+        if request.content_length > max_size:
+            log_request('/transcribe/stream', 'POST', 413)
+            return {'success': False, 'error': f"File too large. Maximum size: {Config.MAX_AUDIO_SIZE_MB} MB"}, 413
+    
+    model_name = request.args.get('model')
+    try:
+        resolve_model_path(model_name)
+    except ValueError as e:
+        log_request('/transcribe/stream', 'POST', 400)
+        return {'success': False, 'error': str(e)}, 400
+    
+    cancel_token = CancellationToken()
+    upload = IncomingUpload(request.stream, max_size, cancel_token)
+    
+    try:
+        # Only the header has to arrive for this
+        try:
+            probe_incoming(upload)
+        except TranscriptionCancelled as e:
+            log_info(f"Streamed transcription abandoned: {cancel_token.reason}")
+            log_request('/transcribe/stream', 'POST', 499)
+            return {'success': False, 'error': str(e)}, 499
+        except UploadError as e:
+            log_error(f"Audio rejected: {str(e)}")
+            log_request('/transcribe/stream', 'POST', 400)
+            return {'success': False, 'error': str(e)}, 400
+        
+        try:
+            # The socket can't be peeked until all of the body has been received
+            with DisconnectWatcher(request.environ, cancel_token, body_consumed=lambda: upload.finished):
+                text, error = transcribe_audio(upload, model_name=model_name, cancel_token=cancel_token)
+        except Exception as e:
+            log_error(f"Unexpected error during streamed transcription: {str(e)}", e)
+            log_request('/transcribe/stream', 'POST', 500)
+            return {'success': False, 'error': 'An unexpected error occurred'}, 500
+    
+    finally:
+        upload.close()
+    
+    if error and cancel_token.cancelled:
+        log_info(f"Streamed transcription abandoned: {cancel_token.reason}")
+        log_request('/transcribe/stream', 'POST', 499)
+        return {'success': False, 'error': error}, 499
+    
+    if error:
+        log_error(f"Transcription failed: {error}")
+        log_request('/transcribe/stream', 'POST', 500)
+        return {'success': False, 'error': error}, 500
+    
+    log_info(f"✅ Streamed transcription successful: {len(text)} characters "
+             f"({upload.bytes_received} bytes received)")
+    log_request('/transcribe/stream', 'POST', 200)
+    
+    return {
+        'success': True,
+        'text': text,
+        'length': len(text)
+    }, 200
+
+
+@app.route('/transcribe/jobs', methods=['POST'])
+def submit_transcription_job():
+    """Queue an uploaded audio file for background transcription"""
+    
+    log_info("Transcription job requested")
+    
+    if 'audio_file' not in request.files:
+        log_error("No audio file in request")
+        return {'success': False, 'error': 'No audio file provided'}, 400
+    
+    file = request.files['audio_file']
+    
+    is_valid, error_msg = validate_audio_file(file)
+    if not is_valid:
+        log_error(f"Audio validation failed: {error_msg}")
+        return {'success': False, 'error': error_msg}, 400
+    
+    audio_info, error_msg = probe_audio_file(file)
+    if error_msg:
+        log_error(f"Audio rejected: {error_msg}")
+        log_request('/transcribe/jobs', 'POST', 400)
+        return {'success': False, 'error': error_msg}, 400
+    
+    _, error_msg = check_audio_quality(file)
+    if error_msg:
+        log_request('/transcribe/jobs', 'POST', 400)
+        return {'success': False, 'error': error_msg}, 400
+    
+    model_name = request.form.get('model')
+    try:
+        resolve_model_path(model_name)
+    except ValueError as e:
+        log_request('/transcribe/jobs', 'POST', 400)
+        return {'success': False, 'error': str(e)}, 400
+    
+    try:
+        audio_hash = get_upload_hash(file)
+        audio_source = load_uploaded_audio(file)
+        job = transcription_jobs.submit(audio_source, audio_hash, audio_info, model_name)
+    except Exception as e:
+        log_error(f"Failed to queue transcription job: {str(e)}", e)
+        log_request('/transcribe/jobs', 'POST', 500)
+        return {'success': False, 'error': 'An unexpected error occurred'}, 500
+    
+    log_request('/transcribe/jobs', 'POST', 202)
+    return {
+        'success': True,
+        'job_id': job.job_id,
+        'status': job.status,
+        'status_url': url_for('transcription_job_status', job_id=job.job_id)
+    }, 202
+
+
+@app.route('/transcribe/jobs/<job_id>')
+def transcription_job_status(job_id):
+    """Status of a transcription job (queued / running / done / failed)"""
+    
+    job = transcription_jobs.get(job_id)
+    
+    if job is None:
+        log_request(f'/transcribe/jobs/{job_id}', 'GET', 404)
+        return {'success': False, 'error': 'Job not found or expired'}, 404
+    
+    result = job.to_dict()
+    result['success'] = job.status not in ('failed', 'cancelled')
+    return result, 200
+
+
+@app.route('/transcribe/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_transcription_job(job_id):
+    """Cancel a queued or running transcription job"""
+    
+    job = transcription_jobs.cancel(job_id)
+    
+    if job is None:
+        log_request(f'/transcribe/jobs/{job_id}/cancel', 'POST', 404)
+        return {'success': False, 'error': 'Job not found or expired'}, 404
+    
+    if job.status in ('done', 'failed'):
+        log_request(f'/transcribe/jobs/{job_id}/cancel', 'POST', 409)
+        return {'success': False, 'error': f'Job already {job.status}'}, 409
+    
+    log_request(f'/transcribe/jobs/{job_id}/cancel', 'POST', 200)
+    result = job.to_dict()
+    result['success'] = True
+    return result, 200
+
+
+@app.route('/transcribe/live', methods=['POST'])
+def start_live_transcription():
+    """Start a live transcription session (browser streams PCM chunks to it)"""
+    
+    log_info("Live transcription requested")
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        session = live_sessions.create(data.get('sample_rate', 16000), data.get('model'))
+    except (ValueError, TypeError) as e:
+        log_error(f"Live session rejected: {str(e)}")
+        log_request('/transcribe/live', 'POST', 400)
+        return {'success': False, 'error': str(e)}, 400
+    except TimeoutError as e:
+        log_error(f"No recognizer for live session: {str(e)}")
+        log_request('/transcribe/live', 'POST', 503)
+        return {'success': False, 'error': str(e)}, 503
+    
+    log_request('/transcribe/live', 'POST', 200)
+    return {'success': True, 'session_id': session.session_id}, 200
+
+
+@app.route('/transcribe/live/<session_id>', methods=['POST'])
+def live_transcription_chunk(session_id):
+    """Feed one chunk of 16-bit mono PCM and get the transcript so far"""
+    
+    session = live_sessions.get(session_id)
+    
+    if session is None:
+        log_request(f'/transcribe/live/{session_id}', 'POST', 404)
+        return {'success': False, 'error': 'Live session not found or expired'}, 404
+    
+    try:
+        result = session.accept_chunk(request.get_data())
+    except ValueError as e:
+        log_request(f'/transcribe/live/{session_id}', 'POST', 409)
+        return {'success': False, 'error': str(e)}, 409
+    except Exception as e:
+        log_error(f"Live transcription failed: {str(e)}", e)
+        live_sessions.finish(session_id)
+        log_request(f'/transcribe/live/{session_id}', 'POST', 500)
+        return {'success': False, 'error': 'Failed to process audio'}, 500
+    
+    result['success'] = True
+    return result, 200
+
+
+@app.route('/transcribe/live/<session_id>/finish', methods=['POST'])
+def finish_live_transcription(session_id):
+    """Finish a live session and return the full transcript"""
+    
+    try:
+        text = live_sessions.finish(session_id)
+    except Exception as e:
+        log_error(f"Failed to finish live session: {str(e)}", e)
+        log_request(f'/transcribe/live/{session_id}/finish', 'POST', 500)
+        return {'success': False, 'error': 'Failed to finish transcription'}, 500
+    
+    if text is None:
+        log_request(f'/transcribe/live/{session_id}/finish', 'POST', 404)
+        return {'success': False, 'error': 'Live session not found or expired'}, 404
+    
+    log_request(f'/transcribe/live/{session_id}/finish', 'POST', 200)
+    return {'success': True, 'text': text, 'length': len(text)}, 200
+
+
+@app.route('/transcribe/stats')
+def transcribe_stats():
+    """Speech model load times, memory usage and recognizer pool metrics"""
+    
+    stats = model_registry.get_stats()
+    stats['recognizer_pool'] = recognizer_pool.get_stats()
+    stats['transcript_cache'] = transcript_cache.get_stats()
+    stats['live_sessions'] = live_sessions.get_stats()
+    stats['jobs'] = transcription_jobs.get_stats()
+    stats['redecode'] = redecode_stats.get_stats()
+    stats['cancellations'] = cancellation_stats.get_stats()
+    stats['checkpoints'] = checkpoint_store.get_stats()
+    stats['quality_check'] = quality_stats.get_stats()
+    
+    log_request('/transcribe/stats', 'GET', 200)
+    return stats, 200
+
+
+@app.route('/transcribe/models')
+def transcribe_models():
+    """Speech models that can be named in the 'model' field of a request"""
+    
+    models = [
+        {'name': name, 'model_path': path, 'loaded': model_registry.is_loaded(path)}
+        for name, path in sorted(get_model_paths().items())
+    ]
+    
+    log_request('/transcribe/models', 'GET', 200)
+    return {'success': True, 'models': models}, 200
+
+
+@app.route('/transcribe/reload', methods=['POST'])
+def reload_speech_model():
+    """Reload a speech model from disk (the default one unless 'model' is given)"""
+    
+    log_info("Speech model reload requested")
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        model_path = resolve_model_path(data.get('model'))
+    except ValueError as e:
+        log_request('/transcribe/reload', 'POST', 400)
+        return {'success': False, 'error': str(e)}, 400
+    
+    try:
+        model_registry.reload(model_path)
+        recognizer_pool.clear(model_path)
+    except Exception as e:
+        log_error(f"Speech model reload failed: {str(e)}", e)
+        log_request('/transcribe/reload', 'POST', 500)
+        return {'success': False, 'error': 'Failed to reload speech model'}, 500
+    
+    log_request('/transcribe/reload', 'POST', 200)
+    return {'success': True, 'stats': model_registry.get_stats()}, 200
+
+
+@app.route('/ready')
+def ready():
+    """Readiness check for load balancers (503 until warm-up has finished)"""
+    
+    # No-op once run.py (or an earlier probe) has started it
+    start_warmup()
+    
+    status = readiness.get_status()
+    return status, 200 if status['ready'] else 503
 
 
 @app.errorhandler(404)
@@ -0,0 +1,76 @@
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+
+class SharedSamples:
+    """
+    Decoded int16 audio in a shared memory segment, for worker processes.
+
+    Workers get a small handle (segment name and length) instead of a
+    pickled copy of the samples, and read the audio in place with
+    decode_shared_range(). The creating process owns the segment and
+    removes it in close() (or when the `with` block ends), whether the
+    workers succeeded, failed or crashed. If the creating process itself
+    dies, multiprocessing's resource tracker removes the segment.
+    """
+
+    def __init__(self, samples):
+        # A zero-size segment isn't allowed
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+        self.length = len(samples)
+
+        shared = np.ndarray((self.length,), dtype=np.int16, buffer=self._shm.buf)
+        shared[:] = samples
+        del shared
+
+    @property
+    def handle(self):
+        """What a worker needs to find the samples (cheap to pickle)"""
+        return {'name': self._shm.name, 'length': self.length}
+
+    def close(self):
+        """Remove the segment (safe to call more than once)"""
+
+        if self._shm is None:
+            return
+
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def decode_shared_range(handle, start, end, decode, *args):
+    """
+    Call `decode(samples[start:end], *args)` on shared samples, without copying
+
+    Runs in a worker process. The segment is detached before returning;
+    numpy views into it can't outlive that, so `decode` must not keep
+    references to the samples in what it returns.
+    """
+
+    shm = shared_memory.SharedMemory(name=handle['name'])
+
+    try:
+        samples = np.ndarray((handle['length'],), dtype=np.int16, buffer=shm.buf)
+        return decode(samples[start:end], *args)
+    finally:
+        samples = None
+        shm.close()
+
+
+def start_resource_tracker():
+    """
+    Start multiprocessing's resource tracker in this process
+
+    Call before starting worker processes, so they share this tracker.
+    Otherwise a worker that attaches to a segment first starts its own
+    tracker, which "cleans up" segments it never owned when it exits.
+    """
+
+    resource_tracker.ensure_running()
@@ -0,0 +1,407 @@
+import struct
+import hashlib
+import threading
+from collections import deque
+import numpy as np
+from werkzeug.exceptions import ClientDisconnected
+from config import Config
+from app.audio_stream import downmix_to_mono
+from app.resampler import Resampler
+from app.ffmpeg_decoder import FFmpegStream, ffmpeg_available
+
+
+# Header values outside these ranges are corrupt (or hostile), not audio
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+MAX_CHANNELS = 8
+
+# How much of the request body is read from the socket at a time
+READ_AHEAD_BYTES = 64 * 1024
+
+
+class UploadError(ValueError):
+    """A streamed upload was too big, too long or not in a usable format"""
+
+
+class IncomingUpload:
+    """
+    Request body that is decoded while it is still being received.
+
+    Wraps the raw (non-seekable) request stream. A background thread reads
+    the body as fast as the client sends it, so a client that hangs up is
+    noticed as soon as its last bytes arrive rather than once decoding has
+    caught up with them (TCP only delivers the close after the data in
+    front of it). At most `max_bytes` are held while decoding catches up.
+
+    Every byte handed to the decoder is hashed and counted, so the
+    transcript cache key and the size limit work without the upload ever
+    being stored. Bytes read to sniff the format can be pushed back with
+    unread() for the real decoder. If the client goes away mid-upload (the
+    read fails or the body ends early), `cancel_token` is cancelled.
+    `finished` is set once the whole body has been received. Call close()
+    when the request is done with it.
+    """
+
+    def __init__(self, stream, max_bytes=None, cancel_token=None):
+        self._stream = stream
+        self.cancel_token = cancel_token
+        self._pushed_back = b''
+        self._hasher = hashlib.sha256()
+        self.max_bytes = max_bytes or Config.MAX_AUDIO_SIZE_MB * 1024 * 1024
+        self.bytes_received = 0
+        self.finished = False
+
+        # Filled by the read-ahead thread
+        self._chunks = deque()
+        self._buffered = 0
+        self._error = None
+        self._done = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._reader = None
+
+    @property
+    def sha256(self):
+        """Hex digest of the body received so far (all of it once decoding is done)"""
+        return self._hasher.hexdigest()
+
+    def _read_ahead(self):
+        """Receive the body into memory (runs in its own thread)"""
+
+        error = None
+        total = 0
+
+        try:
+            while not self._closed:
+                data = self._stream.read(READ_AHEAD_BYTES)
+                if not data:
+                    break
+
+                total += len(data)
+                if total > self.max_bytes:
+                    error = UploadError(f"File too large. Maximum size: {Config.MAX_AUDIO_SIZE_MB} MB")
+                    break
+
+                with self._condition:
+                    self._chunks.append(data)
+                    self._buffered += len(data)
+                    self._condition.notify_all()
+
+        except ClientDisconnected:
+            error = UploadError("Upload was interrupted")
+            if self.cancel_token is not None:
+                self.cancel_token.cancel('client_disconnect')
+
+        except Exception as e:
+            # e.g. the server closed the connection after the request was answered
+            if not self._closed:
+                error = UploadError(f"Upload was interrupted: {str(e)}")
+
+        with self._condition:
+            self._error = error
+            self.finished = error is None and not self._closed
+            self._done = True
+            self._condition.notify_all()
+
+    def read(self, size=-1):
+        """Read up to `size` bytes (fewer if that's all that has arrived yet)"""
+
+        if self._pushed_back:
+            if size is None or size < 0:
+                size = len(self._pushed_back)
+            data, self._pushed_back = self._pushed_back[:size], self._pushed_back[size:]
+            return data
+
+        if self._reader is None:
+            self._reader = threading.Thread(target=self._read_ahead, name="upload-reader", daemon=True)
+            self._reader.start()
+
+        with self._condition:
+            while not self._done and (not self._chunks or (size is None or size < 0)):
+                self._condition.wait()
+
+            if self._error is not None:
+                if self.cancel_token is not None:
+                    self.cancel_token.raise_if_cancelled()
+                raise self._error
+
+            if size is None or size < 0:
+                size = self._buffered
+
+            parts = []
+            wanted = size
+            while self._chunks and wanted > 0:
+                chunk = self._chunks.popleft()
+                if len(chunk) > wanted:
+                    self._chunks.appendleft(chunk[wanted:])
+                    chunk = chunk[:wanted]
+                parts.append(chunk)
+                wanted -= len(chunk)
+
+            data = b''.join(parts)
+            self._buffered -= len(data)
+
+        self.bytes_received += len(data)
+        self._hasher.update(data)
+        return data
+
+    def close(self):
+        """Stop receiving (the rest of the body, if any, is left unread)"""
+
+        self._closed = True
+        if self._reader is not None:
+            # Returns once the read in progress does
+            self._reader.join(timeout=Config.CANCEL_POLL_SECONDS)
+
+    def read_exactly(self, size):
+        """Read `size` bytes, waiting for more to arrive (fewer only at the end)"""
+
+        parts = []
+        remaining = size
+
+        while remaining > 0:
+            data = self.read(remaining)
+            if not data:
+                break
+            parts.append(data)
+            remaining -= len(data)
+
+        return b''.join(parts)
+
+    def unread(self, data):
+        """Push bytes back so the next read() returns them again"""
+        self._pushed_back = data + self._pushed_back
+
+    def seekable(self):
+        return False
+
+    def describe(self):
+        """Readable name for logs"""
+        return f"<streamed upload, {self.bytes_received} bytes so far>"
+
+    def open_stream(self, block_frames=None, target_rate=None):
+        """Block decoder for this upload (see open_incoming_stream)"""
+        return open_incoming_stream(self, block_frames, target_rate)
+
+
+def read_wav_header(upload):
+    """
+    Read a WAV header off the front of a stream, up to the sample data
+
+    Returns:
+        tuple: (header dict or None if this isn't a 16-bit PCM WAV, header bytes read)
+        The dict has sample_rate, channels and data_size (None if unset).
+
+    Raises:
+        UploadError: If the sample rate or channel count is out of range
+    """
+
+    header = upload.read_exactly(12)
+    if header[0:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None, header
+
+    fmt = None
+
+    while True:
+        chunk = upload.read_exactly(8)
+        header += chunk
+        if len(chunk) < 8:
+            return None, header
+
+        chunk_id = chunk[0:4]
+        size = struct.unpack('<I', chunk[4:8])[0]
+
+        if chunk_id == b'data':
+            break
+
+        # Chunks are padded to an even size
+        body = upload.read_exactly(size + (size & 1))
+        header += body
+
+        if chunk_id == b'fmt ' and size >= 16:
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', body)
+
+            # WAVE_FORMAT_EXTENSIBLE keeps the real format in its sub-format GUID
+            if format_tag == 0xFFFE and size >= 40:
+                format_tag = struct.unpack_from('<H', body, 24)[0]
+
+            fmt = (format_tag, channels, sample_rate, bits)
+
+    if fmt is None or fmt[0] != 1 or fmt[3] != 16:
+        return None, header
+
+    if not MIN_SAMPLE_RATE <= fmt[2] <= MAX_SAMPLE_RATE:
+        raise UploadError(f"Unsupported sample rate: {fmt[2]} Hz")
+
+    if not 1 <= fmt[1] <= MAX_CHANNELS:
+        raise UploadError(f"Unsupported number of channels: {fmt[1]}")
+
+    return {
+        'sample_rate': fmt[2],
+        'channels': fmt[1],
+        # Streaming recorders may leave the size unset (0 or 0xFFFFFFFF)
+        'data_size': size if size not in (0, 0xFFFFFFFF) else None
+    }, header
+
+
+class IncomingWavStream:
+    """
+    Decodes a 16-bit PCM WAV upload block by block as its bytes arrive.
+
+    Same interface as AudioStream. The recognizer gets the first block as
+    soon as it has been received, so decoding runs alongside the upload
+    instead of after it.
+    """
+
+    def __init__(self, upload, header, block_frames=None, target_rate=None):
+        self.upload = upload
+        self.block_frames = block_frames or Config.AUDIO_BLOCK_FRAMES
+        self.sample_rate = header['sample_rate']
+        self.channels = header['channels']
+        self.data_size = header['data_size']
+        self.output_rate = int(target_rate or self.sample_rate)
+        self.format = 'WAV'
+        self.subtype = 'PCM_16'
+        self.zero_copy = False
+
+        # Unknown until the upload is complete
+        self.frames = 0
+
+    @property
+    def duration(self):
+        """Seconds received so far (the full length once blocks() is done)"""
+        return self.frames / self.sample_rate
+
+    def mapped_samples(self):
+        """Nothing to map while the upload is still arriving"""
+        return None
+
+    def blocks(self, start_frame=0):
+        """
+        Yield mono int16 numpy blocks as the upload arrives
+
+        Args:
+            start_frame: Skip this many frames (at the output rate) first
+
+        Raises:
+            UploadError: If the recording is longer than allowed
+        """
+
+        frame_bytes = 2 * self.channels
+        block_bytes = self.block_frames * frame_bytes
+        max_frames = int(Config.MAX_AUDIO_DURATION_MINUTES * 60 * self.sample_rate)
+        remaining = self.data_size
+
+        resampler = None
+        if self.output_rate != self.sample_rate:
+            resampler = Resampler(self.sample_rate, self.output_rate)
+
+        # Can't seek in a request body; read past the skipped part
+        skip_bytes = round(start_frame * self.sample_rate / self.output_rate) * frame_bytes
+        if remaining is not None:
+            skip_bytes = min(skip_bytes, remaining)
+            remaining -= skip_bytes
+        self.frames = len(self.upload.read_exactly(skip_bytes)) // frame_bytes
+
+        while remaining is None or remaining > 0:
+            size = block_bytes if remaining is None else min(block_bytes, remaining)
+            data = self.upload.read_exactly(size)
+
+            # A cut-off upload can end mid-frame
+            data = data[:len(data) - len(data) % frame_bytes]
+            if not data:
+                break
+
+            if remaining is not None:
+                remaining -= len(data)
+
+            block = np.frombuffer(data, dtype='<i2').reshape(-1, self.channels)
+            self.frames += len(block)
+
+            if self.frames > max_frames:
+                raise UploadError(f"Recording too long. Maximum length: "
+                                  f"{Config.MAX_AUDIO_DURATION_MINUTES} minutes")
+
+            block = downmix_to_mono(block)
+
+            if resampler is not None:
+                block = resampler.process(block)
+                if len(block) == 0:
+                    continue
+
+            yield block
+
+        # Drain trailing chunks (e.g. LIST) so the whole body is hashed
+        while self.upload.read(64 * 1024):
+            pass
+
+        if resampler is not None:
+            tail = resampler.flush()
+            if len(tail):
+                yield tail
+
+
+def probe_incoming(upload):
+    """
+    Check an upload's format (and length, if its header records it) before decoding
+
+    The header bytes are pushed back, so decoding still starts at the
+    first byte.
+
+    Returns:
+        Dictionary with duration_seconds (None if unknown), sample_rate,
+        channels and format (None for formats only ffmpeg can tell)
+
+    Raises:
+        UploadError: If the format can't be decoded or the recording is too long
+    """
+
+    header, header_bytes = read_wav_header(upload)
+    upload.unread(header_bytes)
+
+    if header is None:
+        if not ffmpeg_available():
+            raise UploadError("Streamed uploads must be 16-bit PCM WAV files")
+        return {'duration_seconds': None, 'sample_rate': None, 'channels': None, 'format': None}
+
+    duration = None
+    if header['data_size'] is not None:
+        duration = round(header['data_size'] / (2 * header['channels'] * header['sample_rate']), 2)
+
+        if duration > Config.MAX_AUDIO_DURATION_MINUTES * 60:
+            raise UploadError(f"Recording too long. Maximum length: "
+                              f"{Config.MAX_AUDIO_DURATION_MINUTES} minutes")
+
+    return {
+        'duration_seconds': duration,
+        'sample_rate': header['sample_rate'],
+        'channels': header['channels'],
+        'format': 'WAV'
+    }
+
+
+def open_incoming_stream(upload, block_frames=None, target_rate=None):
+    """
+    Block decoder for an upload that is still arriving
+
+    16-bit PCM WAVs are parsed directly; anything else goes through an
+    ffmpeg pipe (fed from the request) if ffmpeg is installed.
+
+    Returns:
+        IncomingWavStream or FFmpegStream
+
+    Raises:
+        UploadError: If the format can't be decoded without ffmpeg
+    """
+
+    header, header_bytes = read_wav_header(upload)
+
+    if header is not None:
+        return IncomingWavStream(upload, header, block_frames, target_rate)
+
+    if not ffmpeg_available():
+        raise UploadError("Streamed uploads must be 16-bit PCM WAV files")
+
+    # ffmpeg needs to see the bytes we sniffed too
+    upload.unread(header_bytes)
+    return FFmpegStream(upload, block_frames, target_rate)
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from config import Config
+from logger_config import log_info, log_error
+
+
+def make_cache_key(audio_hash, settings):
+    """
+    Cache key for one recording transcribed with one set of engine settings
+
+    Args:
+        audio_hash: SHA-256 hex digest of the uploaded bytes
+        settings: Dictionary of everything that changes the transcript
+                  (engine, model, resampling, VAD...)
+    """
+
+    settings_json = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(f"{audio_hash}:{settings_json}".encode('utf-8')).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Persistent transcript cache (SQLite) keyed by audio hash + settings.
+
+    Total stored text is kept under `max_mb` by evicting the least recently
+    used entries. Hit/miss counters are kept per process.
+    """
+
+    def __init__(self, db_path=None, max_mb=None):
+        self.db_path = db_path or Config.TRANSCRIPT_CACHE_PATH
+        self.max_bytes = int((max_mb or Config.TRANSCRIPT_CACHE_MAX_MB) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _connect(self):
+        """Open a connection, creating the table on first use"""
+
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+
+        if not self._initialized:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    cache_key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_transcripts_last_used ON transcripts (last_used_at)')
+            conn.commit()
+            self._initialized = True
+
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, cache_key):
+        """
+        Look up a transcript
+
+        Returns:
+            Transcript text, or None on a miss
+        """
+
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            cursor.execute('SELECT text FROM transcripts WHERE cache_key = ?', (cache_key,))
+            row = cursor.fetchone()
+
+            if row is not None:
+                cursor.execute(
+                    'UPDATE transcripts SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?',
+                    (time.time(), cache_key)
+                )
+                conn.commit()
+
+            conn.close()
+
+        except sqlite3.Error as e:
+            log_error(f"Transcript cache lookup failed: {str(e)}", e)
+            row = None
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return row[0]
+
+    def put(self, cache_key, text):
+        """Store a transcript and evict old ones if the cache is over budget"""
+
+        size_bytes = len(text.encode('utf-8'))
+        if size_bytes > self.max_bytes:
+            return
+
+        now = time.time()
+
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                INSERT OR REPLACE INTO transcripts
+                (cache_key, text, size_bytes, created_at, last_used_at, hits)
+                VALUES (?, ?, ?, ?, ?, 0)
+            ''', (cache_key, text, size_bytes, now, now))
+
+            evicted = self._evict(cursor)
+
+            conn.commit()
+            conn.close()
+
+        except sqlite3.Error as e:
+            log_error(f"Transcript cache store failed: {str(e)}", e)
+            return
+
+        self._count('stores')
+        if evicted:
+            self._count('evictions', evicted)
+            log_info(f"Transcript cache evicted {evicted} old entries")
+
+    def _evict(self, cursor):
+        """Delete least recently used entries until under max_bytes"""
+
+        cursor.execute('SELECT SUM(size_bytes) FROM transcripts')
+        total = cursor.fetchone()[0] or 0
+
+        if total <= self.max_bytes:
+            return 0
+
+        cursor.execute('SELECT cache_key, size_bytes FROM transcripts ORDER BY last_used_at ASC')
+
+        to_delete = []
+        for cache_key, size_bytes in cursor.fetchall():
+            if total <= self.max_bytes:
+                break
+            to_delete.append((cache_key,))
+            total -= size_bytes
+
+        cursor.executemany('DELETE FROM transcripts WHERE cache_key = ?', to_delete)
+        return len(to_delete)
+
+    def get_stats(self):
+        """
+        Get cache counters and current size
+
+        Returns:
+            Dictionary with hits, misses, hit rate, entries and size
+        """
+
+        with self._lock:
+            stats = dict(self._counters)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        stats['max_mb'] = round(self.max_bytes / (1024 * 1024), 2)
+
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*), SUM(size_bytes) FROM transcripts')
+            entries, size_bytes = cursor.fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            log_error(f"Transcript cache stats failed: {str(e)}", e)
+            entries, size_bytes = None, None
+
+        stats['entries'] = entries
+        stats['size_mb'] = round((size_bytes or 0) / (1024 * 1024), 3)
+        return stats
+
+
+# Shared by every request in this process
+transcript_cache = TranscriptCache()
@@ -0,0 +1,331 @@
+import time
+import heapq
+import secrets
+import threading
+from config import Config
+from app.audio_handler import transcribe_audio, cleanup_audio_file
+from app.cancellation import CancellationToken, cancellation_stats
+from logger_config import log_info, log_error
+
+
+# Weight of the latest job in the running real-time factor estimate
+RTF_SMOOTHING = 0.2
+
+
+class TranscriptionJob:
+    """One queued upload and, once finished, its transcript or error"""
+
+    def __init__(self, audio_source, audio_hash=None, audio_info=None, model_name=None):
+        self.job_id = secrets.token_hex(8)
+        self.audio_source = audio_source
+        self.audio_hash = audio_hash
+        self.audio_info = audio_info or {}
+        self.model_name = model_name
+        self.status = 'queued'
+        self.text = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_token = CancellationToken()
+
+        # Filled in by the scheduler when the job is queued
+        self.expected_run_seconds = None
+        self.expected_wait_seconds = None
+
+    @property
+    def audio_seconds(self):
+        return self.audio_info.get('duration_seconds')
+
+    @property
+    def wait_seconds(self):
+        """Time spent queued (so far, if not started yet)"""
+        return (self.started_at or time.time()) - self.created_at
+
+    def to_dict(self):
+        """Status as returned by the job status endpoint"""
+
+        job = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'model': self.model_name,
+            'audio_seconds': self.audio_seconds,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'expected_run_seconds': self.expected_run_seconds,
+            'expected_wait_seconds': self.expected_wait_seconds,
+            'wait_seconds': round(self.wait_seconds, 2),
+            'cancel_requested': self.cancel_token.cancelled
+        }
+
+        if self.status == 'done':
+            job['text'] = self.text
+            job['length'] = len(self.text)
+        elif self.status in ('failed', 'cancelled'):
+            job['error'] = self.error
+
+        return job
+
+
+class TranscriptionJobManager:
+    """
+    Background transcription workers.
+
+    /transcribe/jobs only queues the upload and returns a job id, so a web
+    worker is never held for a whole decode. A fixed number of worker
+    threads (TRANSCRIPTION_WORKERS) take jobs off the queue; the decoding
+    itself runs in native code, so threads decode in parallel.
+
+    Jobs are run shortest expected job first, so a batch of voice memos
+    doesn't wait behind a two-hour recording. Expected run time is the
+    probed audio duration times the running real-time factor. To stop long
+    jobs from starving, every second spent waiting counts as
+    JOB_AGING_RATE seconds off the expected run time. Since all queued jobs
+    age at the same rate this is a fixed priority per job:
+
+        expected_run_seconds + JOB_AGING_RATE * created_at
+    """
+
+    def __init__(self, workers=None, aging_rate=None):
+        self.workers = workers or Config.TRANSCRIPTION_WORKERS
+        self.aging_rate = Config.JOB_AGING_RATE if aging_rate is None else aging_rate
+        self.estimated_rtf = Config.JOB_ESTIMATED_RTF
+        self._heap = []
+        self._sequence = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._threads = []
+
+    def _start_workers(self):
+        """Start worker threads on first use (not at import time)"""
+
+        with self._lock:
+            if self._threads:
+                return
+
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"transcription-worker-{index}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        log_info(f"Started {self.workers} transcription workers")
+
+    def _expected_run_seconds(self, job):
+        """Estimated decode time (unknown durations count as the longest allowed)"""
+
+        audio_seconds = job.audio_seconds
+        if audio_seconds is None:
+            audio_seconds = Config.MAX_AUDIO_DURATION_MINUTES * 60
+
+        return audio_seconds * self.estimated_rtf
+
+    def _expected_wait_seconds(self, priority):
+        """
+        Work ahead of a job with this priority, spread over the workers
+
+        Counts queued jobs that would run first plus what's left of the
+        running ones. Call with the lock held.
+        """
+
+        now = time.time()
+
+        ahead = sum(
+            job.expected_run_seconds for key, _, job in self._heap
+            if key <= priority and job.status == 'queued'
+        )
+        running = sum(
+            max(0.0, job.expected_run_seconds - (now - job.started_at))
+            for job in self._jobs.values() if job.status == 'running'
+        )
+
+        return round((ahead + running) / self.workers, 2)
+
+    def submit(self, audio_source, audio_hash=None, audio_info=None, model_name=None):
+        """
+        Queue an upload for transcription
+
+        Args:
+            audio_source: Path or in-memory file object (cleaned up by the worker)
+            audio_hash: SHA-256 of the upload, for the transcript cache
+            audio_info: Header probe of the upload (duration, sample rate, channels)
+            model_name: Named Vosk model to transcribe with
+
+        Returns:
+            TranscriptionJob
+        """
+
+        self._start_workers()
+        self.cleanup()
+
+        job = TranscriptionJob(audio_source, audio_hash, audio_info, model_name)
+
+        with self._not_empty:
+            job.expected_run_seconds = round(self._expected_run_seconds(job), 2)
+            priority = job.expected_run_seconds + self.aging_rate * job.created_at
+            job.expected_wait_seconds = self._expected_wait_seconds(priority)
+
+            self._jobs[job.job_id] = job
+            heapq.heappush(self._heap, (priority, self._sequence, job))
+            self._sequence += 1
+            self._not_empty.notify()
+
+        log_info(f"Transcription job queued: {job.job_id} "
+                 f"({job.audio_seconds if job.audio_seconds is not None else '?'}s of audio, "
+                 f"expected wait {job.expected_wait_seconds}s)")
+        return job
+
+    def get(self, job_id):
+        """Get a job by id (None if unknown or expired)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+
+        A queued job is dropped straight away. A running one stops at its
+        next audio block, which frees its worker for the next job.
+
+        Returns:
+            The job, or None if unknown or expired
+        """
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            # Finished (or already cancelled) jobs keep their outcome
+            if job.status not in ('queued', 'running'):
+                return job
+
+            dequeued = job.status == 'queued'
+            job.cancel_token.cancel('job_cancel')
+
+            # Stays in the heap; _next_job skips it
+            if dequeued:
+                job.status = 'cancelled'
+                job.error = 'Transcription was cancelled'
+                job.finished_at = time.time()
+
+        if dequeued:
+            cleanup_audio_file(job.audio_source)
+            job.audio_source = None
+            cancellation_stats.record('job_cancel')
+            log_info(f"Transcription job cancelled before it started: {job.job_id}")
+
+        return job
+
+    def _next_job(self):
+        """Block until a job is queued and take the highest-priority one"""
+
+        with self._not_empty:
+            while True:
+                while not self._heap:
+                    self._not_empty.wait()
+
+                _, _, job = heapq.heappop(self._heap)
+                if job.status == 'queued':
+                    break
+
+            job.status = 'running'
+            job.started_at = time.time()
+            return job
+
+    def _worker_loop(self):
+        while True:
+            self._run(self._next_job())
+
+    def _run(self, job):
+        """Transcribe one job and record the outcome"""
+
+        log_info(f"Transcription job started: {job.job_id} (waited {job.wait_seconds:.1f}s)")
+
+        text = None
+
+        try:
+            text, error = transcribe_audio(job.audio_source, job.audio_hash, job.model_name,
+                                           job.cancel_token)
+        except Exception as e:
+            log_error(f"Transcription job {job.job_id} crashed: {str(e)}", e)
+            error = 'An unexpected error occurred'
+
+        finally:
+            cleanup_audio_file(job.audio_source)
+            job.audio_source = None
+
+        # Under the lock, so cancel() sees either "running" or the outcome
+        with self._lock:
+            if error:
+                job.error = error
+                job.status = 'cancelled' if job.cancel_token.cancelled else 'failed'
+            else:
+                job.text = text
+                job.status = 'done'
+            job.finished_at = time.time()
+
+        self._update_estimate(job)
+
+        log_info(f"Transcription job {job.status}: {job.job_id} "
+                 f"({job.finished_at - job.started_at:.1f}s)")
+
+    def _update_estimate(self, job):
+        """Fold a finished job's real-time factor into the running estimate"""
+
+        # Failed or instant (cached) jobs say nothing about decode speed
+        if job.status != 'done' or not job.audio_seconds:
+            return
+
+        run_seconds = job.finished_at - job.started_at
+        if run_seconds < 0.5:
+            return
+
+        with self._lock:
+            rtf = run_seconds / job.audio_seconds
+            self.estimated_rtf += RTF_SMOOTHING * (rtf - self.estimated_rtf)
+
+    def cleanup(self):
+        """Forget finished jobs older than JOB_RESULT_TTL seconds"""
+
+        cutoff = time.time() - Config.JOB_RESULT_TTL
+
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def get_stats(self):
+        """Number of jobs per status and queue wait times of started jobs"""
+
+        with self._lock:
+            jobs = list(self._jobs.values())
+            estimated_rtf = self.estimated_rtf
+
+        statuses = [job.status for job in jobs]
+        waits = sorted(job.wait_seconds for job in jobs if job.started_at is not None)
+
+        return {
+            'workers': self.workers,
+            'queued': statuses.count('queued'),
+            'running': statuses.count('running'),
+            'done': statuses.count('done'),
+            'failed': statuses.count('failed'),
+            'cancelled': statuses.count('cancelled'),
+            'estimated_rtf': round(estimated_rtf, 4),
+            'mean_wait_seconds': round(sum(waits) / len(waits), 2) if waits else None,
+            'p95_wait_seconds': round(waits[int(0.95 * (len(waits) - 1))], 2) if waits else None,
+            'max_wait_seconds': round(waits[-1], 2) if waits else None
+        }
+
+
+# Shared by every request in this process
+transcription_jobs = TranscriptionJobManager()
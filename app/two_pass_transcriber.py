@@ -0,0 +1,233 @@
+import time
+import threading
+import numpy as np
+from config import Config
+from app.audio_handler import VoskTranscriber
+from app.audio_stream import load_mono_int16, describe_source
+from app.model_registry import resolve_model_path
+from app.parallel_transcriber import decode_utterances, decode_samples
+from app.vad import VoiceActivityDetector
+from app.cancellation import TranscriptionCancelled
+from logger_config import log_info, log_error
+
+
+def mean_confidence(words):
+    """Average Vosk word confidence of an utterance"""
+    return sum(word['conf'] for word in words) / len(words)
+
+
+def utterance_range(words, sample_rate, total_samples, padding_seconds):
+    """
+    Sample range of an utterance, widened by `padding_seconds` on each side
+
+    Vosk word times are a little tight, so without padding the first and
+    last word of a re-decoded utterance are often clipped.
+
+    Returns:
+        tuple: (start, end) sample offsets
+    """
+
+    start = int((words[0]['start'] - padding_seconds) * sample_rate)
+    end = int((words[-1]['end'] + padding_seconds) * sample_rate)
+    return max(0, start), min(total_samples, end)
+
+
+class RedecodeStats:
+    """Process-wide totals of how much audio the second pass had to redo"""
+
+    def __init__(self):
+        self.recordings = 0
+        self.utterances = 0
+        self.redecoded_utterances = 0
+        self.audio_seconds = 0.0
+        self.redecoded_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, redecode):
+        """Add the 'redecode' stats of one transcription"""
+
+        with self._lock:
+            self.recordings += 1
+            self.utterances += redecode['utterances']
+            self.redecoded_utterances += redecode['redecoded_utterances']
+            self.audio_seconds += redecode['audio_seconds']
+            self.redecoded_seconds += redecode['redecoded_seconds']
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'recordings': self.recordings,
+                'utterances': self.utterances,
+                'redecoded_utterances': self.redecoded_utterances,
+                'audio_seconds': round(self.audio_seconds, 2),
+                'redecoded_seconds': round(self.redecoded_seconds, 2),
+                'redecoded_fraction': round(self.redecoded_seconds / self.audio_seconds, 4)
+                if self.audio_seconds else None
+            }
+
+
+class TwoPassVoskTranscriber(VoskTranscriber):
+    """
+    Fast model first, accurate model only where the fast one was unsure.
+
+    The whole recording is decoded with the configured (small, fast) model.
+    Every utterance whose mean word confidence is below
+    REDECODE_CONFIDENCE is then decoded again with REDECODE_MODEL (e.g. a
+    large Vosk model) and its words replaced. Most of a clear recording
+    never reaches the slow model, so its CPU cost is only paid for the hard
+    parts.
+    """
+
+    # The second pass needs the whole first pass, so there's nothing to resume
+    supports_checkpoints = False
+
+    def __init__(self, model_path=None, redecode_model=None, confidence_threshold=None,
+                 padding_seconds=None):
+        super().__init__(model_path)
+        self.redecode_model_path = resolve_model_path(redecode_model or Config.REDECODE_MODEL)
+        self.confidence_threshold = (Config.REDECODE_CONFIDENCE
+                                     if confidence_threshold is None else confidence_threshold)
+        self.padding_seconds = (Config.REDECODE_PADDING_SECONDS
+                                if padding_seconds is None else padding_seconds)
+
+    def get_cache_settings(self):
+        """Adds the second-pass model and threshold (part of the cache key)"""
+
+        settings = super().get_cache_settings()
+        settings['redecode'] = [self.redecode_model_path, self.confidence_threshold,
+                                self.padding_seconds]
+        return settings
+
+    def transcribe(self, audio_path, cancel_token=None, checkpoint=None):
+        """
+        Transcribe audio file, re-decoding low-confidence utterances
+
+        Args:
+            audio_path: Path to audio file, or an in-memory file object
+            cancel_token: Optional CancellationToken, checked between blocks
+
+        Returns:
+            Transcribed text string
+        """
+
+        try:
+            log_info(f"Starting two-pass transcription: {describe_source(audio_path)}")
+
+            decode_start = time.perf_counter()
+            samples, sample_rate = load_mono_int16(audio_path, self.target_rate)
+            decode_seconds = time.perf_counter() - decode_start
+            duration = len(samples) / sample_rate
+
+            # Optionally drop silence first (only the text is kept, so times
+            # can stay relative to the filtered audio)
+            vad = None
+            if Config.VAD_ENABLED:
+                vad = VoiceActivityDetector(sample_rate)
+                speech = list(vad.filter(
+                    samples[i:i + Config.AUDIO_BLOCK_FRAMES]
+                    for i in range(0, len(samples), Config.AUDIO_BLOCK_FRAMES)
+                ))
+                samples = np.concatenate(speech) if speech else np.empty(0, dtype=np.int16)
+
+            words, redecode, stages = self.transcribe_samples(samples, sample_rate, cancel_token)
+            stages['decode'] = round(decode_seconds, 4)
+
+            full_text = ' '.join(word['word'] for word in words).strip()
+
+            self.last_run = {
+                'mode': 'two_pass',
+                'audio_seconds': round(duration, 2),
+                'stages': stages,
+                'redecode': redecode
+            }
+            if vad is not None:
+                self.last_run['vad'] = vad.get_stats()
+                log_info(f"VAD skipped {vad.get_stats()['skipped_fraction']:.1%} of the audio")
+
+            redecode_stats.record(redecode)
+
+            log_info(f"✅ Two-pass transcription complete: {len(full_text)} characters, "
+                     f"{redecode['redecoded_utterances']}/{redecode['utterances']} utterances "
+                     f"({redecode['redecoded_fraction']:.1%} of the audio) re-decoded")
+            return full_text
+
+        except TranscriptionCancelled:
+            log_info(f"Transcription stopped: {cancel_token.reason}")
+            raise
+
+        except Exception as e:
+            log_error(f"Two-pass transcription failed: {str(e)}", e)
+            raise
+
+    def transcribe_samples(self, samples, sample_rate, cancel_token=None):
+        """
+        Decode an int16 array with the fast model, then redo the unsure parts
+
+        Returns:
+            tuple: (words, redecode stats, stage timings)
+        """
+
+        start = time.perf_counter()
+        utterances = decode_utterances(samples, sample_rate, self.model_path,
+                                       cancel_token=cancel_token)
+        first_pass_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        words = []
+        redecoded = 0
+        redecoded_samples = 0
+        covered_until = 0
+        duration = len(samples) / sample_rate
+
+        for index, utterance in enumerate(utterances):
+            if mean_confidence(utterance) >= self.confidence_threshold:
+                words.extend(utterance)
+                continue
+
+            begin, end = utterance_range(utterance, sample_rate, len(samples), self.padding_seconds)
+
+            # The recognizer resamples if the accurate model expects another rate
+            better = decode_samples(samples[begin:end], sample_rate, self.redecode_model_path,
+                                    begin / sample_rate, cancel_token=cancel_token)
+
+            # The padding can reach into the neighbouring utterances; their words stay theirs
+            after = words[-1]['end'] if words else 0.0
+            before = utterances[index + 1][0]['start'] if index + 1 < len(utterances) else duration
+            better = [
+                word for word in better
+                if after <= (word['start'] + word['end']) / 2 <= before
+            ]
+
+            # An empty second result is more likely a miss than proof of silence
+            words.extend(better or utterance)
+            redecoded += 1
+
+            # Padded ranges of close utterances overlap (one can even lie inside
+            # the previous one); count that audio once
+            redecoded_samples += max(0, end - max(begin, covered_until))
+            covered_until = max(covered_until, end)
+
+        second_pass_seconds = time.perf_counter() - start
+
+        redecoded_seconds = redecoded_samples / sample_rate
+
+        redecode = {
+            'model_path': self.redecode_model_path,
+            'confidence_threshold': self.confidence_threshold,
+            'utterances': len(utterances),
+            'redecoded_utterances': redecoded,
+            'audio_seconds': round(duration, 2),
+            'redecoded_seconds': round(redecoded_seconds, 2),
+            'redecoded_fraction': round(redecoded_seconds / duration, 4) if duration else 0.0
+        }
+
+        stages = {
+            'first_pass': round(first_pass_seconds, 4),
+            'second_pass': round(second_pass_seconds, 4)
+        }
+
+        return words, redecode, stages
+
+
+# Shared by every request in this process
+redecode_stats = RedecodeStats()
@@ -0,0 +1,46 @@
+import hashlib
+from flask import Request
+from werkzeug.formparser import default_stream_factory
+
+
+class HashingStream:
+    """
+    File wrapper that SHA-256 hashes uploaded bytes as they are written.
+
+    Werkzeug writes each multipart chunk into the stream as it arrives,
+    so the hash is ready as soon as the upload has been received, without
+    reading the file a second time.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._hasher = hashlib.sha256()
+
+    def write(self, data):
+        self._hasher.update(data)
+        return self._stream.write(data)
+
+    @property
+    def sha256(self):
+        """Hex digest of everything written so far"""
+        return self._hasher.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        return iter(self._stream)
+
+
+class HashingRequest(Request):
+    """Request class whose file uploads are hashed while they are received"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        stream = default_stream_factory(
+            total_content_length=total_content_length,
+            filename=filename,
+            content_type=content_type,
+            content_length=content_length
+        )
+        return HashingStream(stream)
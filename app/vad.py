@@ -0,0 +1,202 @@
+from bisect import bisect_right
+import numpy as np
+from config import Config
+
+
+NOISE_FLOOR_DOUBLING_SECONDS = 5.0
+
+
+class VoiceActivityDetector:
+    """
+    Energy / zero-crossing-rate voice activity detector for int16 streams.
+
+    Frames are classified a whole block at a time with numpy. A frame is
+    speech if it is clearly louder than the running noise floor, or if it
+    is moderately loud with a high zero-crossing rate (unvoiced sounds like
+    "s" and "f"). Every speech frame also keeps `padding` frames on each
+    side, so word edges aren't clipped.
+
+    Dropped audio is remembered in an offset map, so times reported by the
+    recognizer (which only sees the kept audio) can be mapped back to times
+    in the original recording with to_original_time().
+    """
+
+    def __init__(self, sample_rate, frame_ms=None, padding_ms=None):
+        self.sample_rate = int(sample_rate)
+        self.frame_length = int(self.sample_rate * (frame_ms or Config.VAD_FRAME_MS) / 1000)
+
+        padding_ms = Config.VAD_PADDING_MS if padding_ms is None else padding_ms
+        self.padding = int(padding_ms / 1000 * self.sample_rate) // self.frame_length
+
+        self.min_energy = Config.VAD_MIN_ENERGY
+        self.energy_ratio = Config.VAD_ENERGY_RATIO
+        self.zcr_threshold = Config.VAD_ZCR_THRESHOLD
+        self.noise_floor = None
+
+        self._residual = np.empty(0, dtype=np.int16)
+        self._pending = np.empty((0, self.frame_length), dtype=np.int16)
+        self._pending_last = np.empty(0, dtype=np.int64)
+        self._frame_count = 0
+        self._last_speech = -(10 ** 9)
+        self._finalized = 0
+
+        # (original_sample, kept_sample) at the start of each kept run
+        self._runs_original = []
+        self._runs_kept = []
+        self._in_run = False
+        self.total_samples = 0
+        self.kept_samples = 0
+
+    def _classify(self, frames):
+        """Speech flag for each frame (one row per frame)"""
+
+        as_float = frames.astype(np.float32)
+        energy = np.sqrt(np.mean(as_float * as_float, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+
+        # Noise floor: quietest tenth of this block, allowed to rise by at
+        # most 2x every NOISE_FLOOR_DOUBLING_SECONDS so steady speech isn't
+        # mistaken for noise
+        block_floor = float(np.percentile(energy, 10))
+        if self.noise_floor is None:
+            self.noise_floor = min(block_floor, self.min_energy)
+        else:
+            block_seconds = frames.size / self.sample_rate
+            rise = 2 ** (block_seconds / NOISE_FLOOR_DOUBLING_SECONDS)
+            self.noise_floor = min(self.noise_floor * rise, block_floor)
+
+        threshold = max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+        loud = energy > threshold
+        fricative = (energy > threshold / 2) & (zcr > self.zcr_threshold)
+        return loud | fricative
+
+    def _finalize(self, frames, first_index, keep):
+        """Emit kept frames and extend the offset map"""
+
+        if len(keep) == 0:
+            return np.empty(0, dtype=np.int16)
+
+        output = []
+
+        # Split the keep mask into runs of equal values
+        changes = np.flatnonzero(np.diff(keep.astype(np.int8))) + 1
+        bounds = np.concatenate([[0], changes, [len(keep)]])
+
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if keep[start]:
+                if not self._in_run:
+                    self._runs_original.append(int(first_index + start) * self.frame_length)
+                    self._runs_kept.append(self.kept_samples)
+                    self._in_run = True
+                samples = frames[start:end].ravel()
+                self.kept_samples += len(samples)
+                output.append(samples)
+            else:
+                self._in_run = False
+
+        self._finalized += len(keep)
+
+        if not output:
+            return np.empty(0, dtype=np.int16)
+        return np.concatenate(output)
+
+    def process(self, block):
+        """
+        Feed the next block of int16 samples
+
+        Returns:
+            Speech samples that are ready (output lags by `padding` frames)
+        """
+
+        self.total_samples += len(block)
+        samples = np.concatenate([self._residual, block])
+        n_frames = len(samples) // self.frame_length
+        self._residual = samples[n_frames * self.frame_length:]
+
+        if n_frames == 0:
+            return np.empty(0, dtype=np.int16)
+
+        frames = samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        indices = self._frame_count + np.arange(n_frames)
+        self._frame_count += n_frames
+
+        # Index of the latest speech frame at or before each frame
+        speech = np.where(self._classify(frames), indices, -(10 ** 9))
+        last = np.maximum.accumulate(np.concatenate([[self._last_speech], speech]))[1:]
+        self._last_speech = int(last[-1])
+
+        all_frames = np.concatenate([self._pending, frames])
+        all_last = np.concatenate([self._pending_last, last])
+        first_index = self._finalized
+
+        # A frame is decided once the frame `padding` after it has been classified
+        ready = max(0, len(all_frames) - self.padding)
+        frame_index = first_index + np.arange(ready)
+        keep = all_last[self.padding:self.padding + ready] >= frame_index - self.padding
+
+        self._pending = all_frames[ready:]
+        self._pending_last = all_last[ready:]
+
+        return self._finalize(all_frames[:ready], first_index, keep)
+
+    def flush(self):
+        """Decide the frames still waiting for look-ahead at end of stream"""
+
+        frames = self._pending
+        frame_index = self._finalized + np.arange(len(frames))
+        keep = self._last_speech >= frame_index - self.padding
+        output = self._finalize(frames, self._finalized, keep)
+
+        # Partial last frame goes with whatever came before it
+        tail = self._residual
+        self._residual = np.empty(0, dtype=np.int16)
+        if len(tail) and self._last_speech >= self._finalized - self.padding:
+            if not self._in_run:
+                self._runs_original.append(self._finalized * self.frame_length)
+                self._runs_kept.append(self.kept_samples)
+                self._in_run = True
+            self.kept_samples += len(tail)
+            output = np.concatenate([output, tail])
+
+        self._pending = np.empty((0, self.frame_length), dtype=np.int16)
+        self._pending_last = np.empty(0, dtype=np.int64)
+        return output
+
+    def filter(self, blocks):
+        """Wrap a block generator, yielding only speech"""
+
+        for block in blocks:
+            speech = self.process(block)
+            if len(speech):
+                yield speech
+
+        tail = self.flush()
+        if len(tail):
+            yield tail
+
+    def to_original_time(self, seconds):
+        """Map a time in the kept (speech-only) audio back to the original recording"""
+
+        kept_sample = seconds * self.sample_rate
+        run = bisect_right(self._runs_kept, kept_sample) - 1
+
+        if run < 0:
+            return seconds
+
+        original = self._runs_original[run] + (kept_sample - self._runs_kept[run])
+        return original / self.sample_rate
+
+    def get_stats(self):
+        """Skipped fraction and speech/total seconds"""
+
+        skipped = 0.0
+        if self.total_samples:
+            skipped = 1 - self.kept_samples / self.total_samples
+
+        return {
+            'audio_seconds': round(self.total_samples / self.sample_rate, 2),
+            'speech_seconds': round(self.kept_samples / self.sample_rate, 2),
+            'skipped_fraction': round(skipped, 4)
+        }
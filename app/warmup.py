@@ -0,0 +1,152 @@
+import time
+import json
+import threading
+import numpy as np
+from config import Config
+from app.model_registry import model_registry, get_model_sample_rate, resolve_model_path
+from app.recognizer_pool import recognizer_pool
+from app.audio_stream import as_waveform
+from logger_config import log_info, log_error
+
+
+WARMUP_SECONDS = 2.0
+
+
+def synthetic_speech(sample_rate, seconds=WARMUP_SECONDS):
+    """
+    Short int16 waveform that keeps the decoder busy
+
+    Harmonics of a wobbling pitch in syllable-length bursts plus a little
+    noise, so the acoustic model and a good part of the graph get used
+    (pure silence is mostly skipped by the decoder).
+    """
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+
+    pitch = 140 * (1 + 0.15 * np.sin(2 * np.pi * 2.5 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+
+    signal = 0.25 * voiced * syllables + rng.normal(0, 0.01, len(t))
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+class Readiness:
+    """
+    Startup state for the /ready endpoint.
+
+    Without warm-up the app is ready straight away. With warm-up it only
+    becomes ready once every configured model has been loaded and has
+    decoded a synthetic waveform, so a load balancer won't send traffic
+    to a cold worker.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = None
+        self.finished_at = None
+        self.models = {}
+        self.error = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def claim_start(self):
+        """True for the first caller only (warm-up runs once per process)"""
+
+        with self._lock:
+            if self._started:
+                return False
+            self._started = True
+            return True
+
+    def mark_ready(self):
+        with self._lock:
+            self.ready = True
+            self.finished_at = time.time()
+
+    def get_status(self):
+        """Readiness flag and warm-up timings"""
+
+        with self._lock:
+            status = {
+                'ready': self.ready,
+                'models': dict(self.models),
+                'error': self.error
+            }
+            if self.started_at and self.finished_at:
+                status['warmup_seconds'] = round(self.finished_at - self.started_at, 2)
+
+        return status
+
+
+def warm_up_model(model_path):
+    """
+    Load one model and run the synthetic waveform through a pooled recognizer
+
+    Returns:
+        Seconds taken
+    """
+
+    start = time.perf_counter()
+
+    model_registry.get_model(model_path)
+    sample_rate = get_model_sample_rate(model_path)
+    samples = synthetic_speech(sample_rate)
+
+    # The recognizer goes back to the pool warm, ready for the first request
+    with recognizer_pool.recognizer(sample_rate, model_path) as rec:
+        for position in range(0, len(samples), Config.AUDIO_BLOCK_FRAMES):
+            rec.AcceptWaveform(as_waveform(samples[position:position + Config.AUDIO_BLOCK_FRAMES]))
+        json.loads(rec.FinalResult())
+
+    return time.perf_counter() - start
+
+
+def warm_up(model_names=None):
+    """Warm up every configured model, then flip the readiness flag"""
+
+    model_names = model_names or Config.WARMUP_MODELS
+    readiness.started_at = time.time()
+
+    log_info(f"Warming up {len(model_names)} speech model(s)...")
+
+    for model_name in model_names:
+        try:
+            seconds = warm_up_model(resolve_model_path(model_name))
+            readiness.models[model_name] = round(seconds, 2)
+            log_info(f"✅ Warmed up {model_name} in {seconds:.2f}s")
+        except Exception as e:
+            # Stay not-ready: a worker without its model can't serve transcriptions
+            log_error(f"Warm-up failed for {model_name}: {str(e)}", e)
+            readiness.error = f"Warm-up failed for {model_name}"
+            return
+
+    readiness.mark_ready()
+    log_info("✅ Warm-up complete, ready for traffic")
+
+
+def start_warmup():
+    """
+    Warm up in a background thread if enabled (ready immediately otherwise)
+
+    Not done on import, so batch workers and benchmarks that import the app
+    don't load models they never use. run.py starts it with the server;
+    under other WSGI servers the first /ready probe does. Later calls do
+    nothing.
+    """
+
+    if not readiness.claim_start():
+        return
+
+    if not Config.WARMUP_ON_STARTUP:
+        readiness.mark_ready()
+        return
+
+    thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+    thread.start()
+
+
+# Shared by every request in this process
+readiness = Readiness()
@@ -0,0 +1,367 @@
+"""
+Transcribe a folder (or glob) of recordings from the command line.
+
+Files are spread over a process pool; each worker loads the speech model
+once and keeps it for every file it handles. Every transcript is written
+as <name>.<ext>.txt under the output folder, and a line is appended to
+manifest.jsonl there once it is safely on disk. Re-running the same
+command skips the files the manifest lists as done (unless they changed),
+so an interrupted overnight run picks up where it stopped; a file that
+was cut off part-way resumes from its last checkpoint. Silent, clipped or
+noise-only files are marked failed after a quick signal check instead of
+being decoded.
+
+Usage:
+    python batch_transcribe.py calls/ --output transcripts --workers 4
+    python batch_transcribe.py "dumps/**/*.wav" --model en-large
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from multiprocessing import SimpleQueue
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.ogg', '.webm', '.flac')
+
+# Set once per worker process by _init_worker
+_transcriber = None
+_started = None
+
+
+def find_audio_files(inputs):
+    """
+    Expand folders (recursively) and glob patterns into a sorted list of recordings
+    """
+
+    found = set()
+
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in files:
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        found.add(os.path.abspath(os.path.join(root, name)))
+        else:
+            for path in glob.glob(pattern, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS):
+                    found.add(os.path.abspath(path))
+
+    return sorted(found)
+
+
+def file_signature(path):
+    """Size and modification time, so a changed recording is transcribed again"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def load_manifest(manifest_path):
+    """
+    Finished files from an earlier run
+
+    Returns:
+        Dictionary of audio path -> last manifest entry for it
+    """
+
+    entries = {}
+
+    if not os.path.exists(manifest_path):
+        return entries
+
+    with open(manifest_path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Half-written last line from a crash
+                continue
+            entries[entry['audio_path']] = entry
+
+    return entries
+
+
+def append_manifest(manifest_path, entry):
+    """Append one entry and make sure it reaches the disk"""
+
+    with open(manifest_path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def transcript_path_for(audio_path, input_root, output_dir):
+    """
+    <output_dir>/<path relative to the common input folder>.txt
+
+    The audio extension is kept (call.wav -> call.wav.txt), so call.wav and
+    call.mp3 in the same folder don't share one transcript.
+    """
+    relative = os.path.relpath(audio_path, input_root)
+    return os.path.join(output_dir, relative + '.txt')
+
+
+def worker_failure_entry(audio_path, transcript_path, error):
+    """Manifest entry for a file whose worker failed (e.g. the process died)"""
+
+    entry = {'audio_path': audio_path, 'transcript_path': transcript_path}
+    entry.update(file_signature(audio_path))
+    entry['status'] = 'failed'
+    entry['error'] = f"Worker failed: {error}"
+    entry['seconds'] = None
+    return entry
+
+
+def _run_pool(audio_paths, workers, model_name, input_root, output_dir, report):
+    """
+    Transcribe files on one process pool, passing each manifest entry to `report`
+
+    A worker that dies (out of memory, native abort...) breaks the whole
+    pool, and every unfinished file fails with it. Those files get no
+    entry here; they are returned instead, split by whether a worker had
+    started on them, so the caller can find the one that caused it.
+
+    Returns:
+        tuple: (files being transcribed when the pool broke, files never started)
+    """
+
+    started = SimpleQueue()
+    unfinished = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_name, started)) as executor:
+        futures = {}
+        for audio_path in audio_paths:
+            transcript_path = transcript_path_for(audio_path, input_root, output_dir)
+            future = executor.submit(_transcribe_file, audio_path, transcript_path)
+            futures[future] = (audio_path, transcript_path)
+
+        try:
+            for future in as_completed(futures):
+                try:
+                    entry = future.result()
+                except BrokenProcessPool:
+                    unfinished.append(futures[future][0])
+                    continue
+                except Exception as e:
+                    entry = worker_failure_entry(*futures[future], str(e) or type(e).__name__)
+
+                report(entry)
+
+        except KeyboardInterrupt:
+            print("⏹️  Interrupted - run the same command again to resume")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    running = set()
+    while not started.empty():
+        running.add(started.get())
+
+    return ([path for path in unfinished if path in running],
+            [path for path in unfinished if path not in running])
+
+
+def _init_worker(model_name, started):
+    """Load the model once per worker process"""
+
+    global _transcriber, _started
+
+    from app.audio_handler import get_transcriber
+    _transcriber = get_transcriber(model_name)
+    _started = started
+
+
+def _transcribe_file(audio_path, transcript_path):
+    """Runs in a worker process; writes the transcript and returns its manifest entry"""
+
+    from config import Config
+    from app.checkpoints import checkpoint_store
+    from app.transcript_cache import make_cache_key
+    from app.audio_quality import analyze_audio_quality
+
+    # Tells the parent which file to blame if this process dies
+    # (SimpleQueue writes straight to the pipe, so this survives a crash)
+    _started.put(audio_path)
+
+    entry = {'audio_path': audio_path, 'transcript_path': transcript_path}
+    entry.update(file_signature(audio_path))
+
+    start = time.perf_counter()
+
+    try:
+        # Silent, clipped or noise-only files fail in well under a second
+        if Config.QUALITY_CHECK_ENABLED:
+            try:
+                report, error = analyze_audio_quality(audio_path)
+            except Exception:
+                # Formats only ffmpeg reads aren't checked
+                report, error = None, None
+            if error:
+                entry['quality'] = report['reason']
+                raise ValueError(error)
+
+        # A file the last run crashed on resumes from its checkpoint
+        checkpoint = None
+        if Config.CHECKPOINTS_ENABLED and _transcriber.supports_checkpoints:
+            recording = f"{audio_path}:{entry['size']}:{entry['mtime']}"
+            checkpoint = checkpoint_store.open(make_cache_key(recording, _transcriber.get_cache_settings()))
+
+        text = _transcriber.transcribe(audio_path, checkpoint=checkpoint)
+
+        # Write to a temp file first so a crash never leaves half a transcript
+        os.makedirs(os.path.dirname(transcript_path), exist_ok=True)
+        temp_path = transcript_path + '.part'
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, transcript_path)
+
+        entry['status'] = 'done'
+        entry['audio_seconds'] = _transcriber.last_run.get('audio_seconds')
+        entry['resumed_from_seconds'] = _transcriber.last_run.get('resumed_from_seconds')
+        entry['characters'] = len(text)
+
+    except Exception as e:
+        entry['status'] = 'failed'
+        entry['error'] = str(e)
+
+    entry['seconds'] = round(time.perf_counter() - start, 2)
+    return entry
+
+
+def format_hours(seconds):
+    return f"{seconds / 3600:.2f}h"
+
+
+def run_batch(inputs, output_dir, workers=None, model_name=None, retry_failed=False):
+    """
+    Transcribe every recording that isn't already done
+
+    Returns:
+        Summary dictionary (files, failures, audio seconds, wall seconds, throughput)
+    """
+
+    from app.model_registry import resolve_model_path
+
+    # Fail here rather than in every worker
+    try:
+        model_path = resolve_model_path(model_name)
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return None
+
+    if not os.path.exists(model_path):
+        print(f"❌ Speech model not found at: {model_path} (run from the project folder)")
+        return None
+
+    audio_files = find_audio_files(inputs)
+    if not audio_files:
+        print("❌ No recordings found")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'manifest.jsonl')
+    previous = load_manifest(manifest_path)
+
+    input_root = os.path.commonpath([os.path.dirname(path) for path in audio_files])
+
+    pending = []
+    for audio_path in audio_files:
+        entry = previous.get(audio_path)
+        unchanged = entry is not None and all(
+            entry.get(key) == value for key, value in file_signature(audio_path).items()
+        )
+
+        if unchanged and (entry['status'] == 'done' or not retry_failed):
+            continue
+
+        pending.append(audio_path)
+
+    skipped = len(audio_files) - len(pending)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+
+    print("=" * 50)
+    print(f"🎧 {len(audio_files)} recordings, {skipped} already in the manifest, "
+          f"{len(pending)} to transcribe with {workers} workers")
+    print("=" * 50)
+
+    summary = {'files': 0, 'failed': 0, 'audio_seconds': 0.0}
+    start = time.perf_counter()
+
+    def report(entry):
+        append_manifest(manifest_path, entry)
+
+        summary['files'] += 1
+        number = summary['files']
+        name = os.path.relpath(entry['audio_path'], input_root)
+
+        if entry['status'] == 'done':
+            summary['audio_seconds'] += entry['audio_seconds'] or 0
+            print(f"✅ [{number}/{len(pending)}] {name} "
+                  f"({entry['audio_seconds']}s audio in {entry['seconds']}s)")
+        else:
+            summary['failed'] += 1
+            print(f"❌ [{number}/{len(pending)}] {name}: {entry['error']}")
+
+    remaining = pending
+
+    while remaining:
+        in_flight, not_started = _run_pool(remaining, workers, model_name, input_root, output_dir, report)
+
+        if not in_flight and len(not_started) == len(remaining):
+            # Workers die before taking any file (e.g. the model fails to load)
+            for audio_path in not_started:
+                report(worker_failure_entry(audio_path, transcript_path_for(audio_path, input_root, output_dir),
+                                            "worker processes could not start"))
+            break
+
+        if in_flight:
+            print(f"⚠️  A worker process died; re-running {len(in_flight)} file(s) it may have "
+                  f"been working on one at a time")
+
+        # Alone in a pool, a file that kills its worker again is the one to blame
+        for audio_path in in_flight:
+            crashed, lost = _run_pool([audio_path], 1, model_name, input_root, output_dir, report)
+            if crashed or lost:
+                report(worker_failure_entry(audio_path, transcript_path_for(audio_path, input_root, output_dir),
+                                            "the worker process died while transcribing this file"))
+
+        remaining = not_started
+
+    wall_seconds = time.perf_counter() - start
+    summary['wall_seconds'] = round(wall_seconds, 2)
+    summary['audio_hours_per_hour'] = round(summary['audio_seconds'] / wall_seconds, 2) if wall_seconds else None
+
+    print("=" * 50)
+    print(f"Transcribed {summary['files'] - summary['failed']} files, {summary['failed']} failed")
+    print(f"{format_hours(summary['audio_seconds'])} of audio in {format_hours(wall_seconds)} "
+          f"= {summary['audio_hours_per_hour']} audio-hours per wall-hour")
+    print(f"📄 Manifest: {manifest_path}")
+    print("=" * 50)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a folder of recordings")
+    parser.add_argument('inputs', nargs='+', help="Folders, files or glob patterns")
+    parser.add_argument('--output', default='transcripts', help="Folder for transcripts and the manifest")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--model', help="Named speech model (see VOSK_MODELS)")
+    parser.add_argument('--retry-failed', action='store_true', help="Also retry files that failed before")
+    args = parser.parse_args()
+
+    try:
+        summary = run_batch(args.inputs, args.output, args.workers, args.model, args.retry_failed)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    if summary is None or summary['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+import os
+import re
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.ogg', '.webm', '.flac')
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def find_recordings(paths):
+    """
+    Expand files and directories into a sorted list of audio files
+
+    Args:
+        paths: List of files or directories (defaults to benchmarks/fixtures)
+    """
+
+    found = []
+
+    for path in paths or [FIXTURES_DIR]:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    found.append(os.path.join(path, name))
+        elif os.path.exists(path):
+            found.append(path)
+
+    return found
+
+
+def load_reference(audio_path):
+    """Reference transcript stored next to a recording as <name>.txt (or None)"""
+
+    reference_path = audio_path.rsplit('.', 1)[0] + '.txt'
+
+    if not os.path.exists(reference_path):
+        return None
+
+    with open(reference_path, 'r') as f:
+        return f.read()
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, the way Vosk outputs them"""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word error rate: (substitutions + deletions + insertions) / reference words
+
+    Returns:
+        float, or None if the reference is empty
+    """
+
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+
+    if not ref:
+        return None
+
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+
+    return round(previous[-1] / len(ref), 4)
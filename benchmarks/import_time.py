@@ -0,0 +1,108 @@
+"""
+How long `import app` takes (what every web worker pays at startup) and
+which heavy libraries it pulls in.
+
+Each measurement runs `python -X importtime` in a fresh interpreter. The
+lazily imported libraries (vosk, soundfile, reportlab) are also timed on
+top of `import app`, so the report shows how much startup time is saved
+by only importing them when audio is decoded or a PDF is rendered.
+
+Usage:
+    python benchmarks/import_time.py --repeat 5 --output import_time.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily (only once audio is decoded or a PDF is rendered)
+LAZY_LIBRARIES = ['vosk', 'soundfile', 'reportlab.platypus']
+
+
+def import_times(statement):
+    """
+    Run one statement under -X importtime in a fresh interpreter
+
+    Returns:
+        tuple: (total ms of all top-level imports, {module: cumulative ms})
+    """
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+    total = 0.0
+    times = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        milliseconds = int(cumulative) / 1000
+
+        # Nested imports are indented; top-level ones add up to the whole statement
+        if not name.startswith('  '):
+            total += milliseconds
+        times[name.strip()] = milliseconds
+
+    return total, times
+
+
+def median_total(statement, repeat):
+    """Median total import time of a statement over `repeat` fresh interpreters"""
+    return round(statistics.median(import_times(statement)[0] for _ in range(repeat)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import time report")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    startup_ms = median_total('import app', args.repeat)
+    _, startup_modules = import_times('import app')
+
+    # What each library would add on top of what startup already loads
+    libraries = []
+    for name in LAZY_LIBRARIES:
+        with_library = median_total(f'import app; import {name}', args.repeat)
+        libraries.append({
+            'module': name,
+            'extra_ms': round(with_library - startup_ms, 1),
+            'loaded_at_startup': name in startup_modules
+        })
+
+    eager_ms = median_total('import app; ' + '; '.join(f'import {name}' for name in LAZY_LIBRARIES), args.repeat)
+    slowest = sorted(startup_modules.items(), key=lambda item: item[1], reverse=True)[:15]
+
+    report = {
+        'startup_ms': startup_ms,
+        'startup_with_eager_imports_ms': eager_ms,
+        'saved_ms': round(eager_ms - startup_ms, 1),
+        'libraries': libraries,
+        'slowest_modules': [{'module': name, 'import_ms': ms} for name, ms in slowest]
+    }
+
+    print("=" * 50)
+    print(f"⏱️  import app: {startup_ms} ms ({eager_ms} ms with everything imported up front)")
+    for lib in libraries:
+        status = 'loaded at startup' if lib['loaded_at_startup'] else 'lazy'
+        print(f"   {lib['module']:<20} +{lib['extra_ms']:>6} ms  {status}")
+    print(f"✅ Startup time saved: {report['saved_ms']} ms")
+    print("=" * 50)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Generate the benchmark fixture recordings in benchmarks/fixtures.
+
+The fixtures are synthetic speech-like audio (voiced "syllables" with a
+moving pitch, fricative noise bursts and pauses), so they exercise the
+decoder, resampler and recognizer without shipping real recordings. They
+cover different lengths, sample rates, channel counts and containers.
+
+Real recordings (with an optional <name>.txt reference transcript) can be
+dropped into the same folder and are picked up by the benchmarks too.
+
+Usage:
+    python benchmarks/make_fixtures.py [--force]
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import FIXTURES_DIR
+
+# (file name, seconds, sample rate, channels, soundfile format, subtype)
+FIXTURES = [
+    ('short_16k_mono.wav', 10, 16000, 1, 'WAV', 'PCM_16'),
+    ('phone_8k_mono.wav', 30, 8000, 1, 'WAV', 'PCM_16'),
+    ('meeting_44k_stereo.wav', 60, 44100, 2, 'WAV', 'PCM_16'),
+    ('meeting_48k_mono.flac', 120, 48000, 1, 'FLAC', 'PCM_16'),
+    ('meeting_48k_stereo.ogg', 120, 48000, 2, 'OGG', 'VORBIS'),
+    ('meeting_22k_mono.mp3', 60, 22050, 1, 'MP3', 'MPEG_LAYER_III'),
+    ('long_16k_mono.flac', 600, 16000, 1, 'FLAC', 'PCM_16'),
+]
+
+WRITE_BLOCK_FRAMES = 65536
+
+
+def synthesize_speech(seconds, sample_rate, seed=0):
+    """
+    Speech-like mono float signal in [-1, 1]
+
+    Syllables of 120-300 ms (harmonics of a drifting pitch, with an
+    occasional noise burst standing in for a fricative) grouped into
+    phrases separated by 0.3-1.5 s pauses with low background noise.
+    """
+
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    signal = rng.normal(0, 0.002, total)
+
+    position = int(rng.uniform(0.2, 0.6) * sample_rate)
+    while position < total:
+        # One phrase of 3-12 syllables
+        for _ in range(rng.integers(3, 13)):
+            length = int(rng.uniform(0.12, 0.30) * sample_rate)
+            end = min(position + length, total)
+            if end <= position:
+                break
+
+            t = np.arange(end - position) / sample_rate
+            envelope = np.sin(np.pi * np.arange(end - position) / (end - position))
+
+            if rng.random() < 0.2:
+                syllable = rng.normal(0, 0.15, end - position)
+            else:
+                pitch = rng.uniform(90, 220) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))
+                phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+                syllable = sum(np.sin(k * phase) / k for k in range(1, 8)) * 0.2
+
+            signal[position:end] += syllable * envelope
+            position = end + int(rng.uniform(0.02, 0.08) * sample_rate)
+
+        position += int(rng.uniform(0.3, 1.5) * sample_rate)
+
+    return np.clip(signal, -1, 1)
+
+
+def make_fixture(path, seconds, sample_rate, channels, file_format, subtype):
+    """Write one fixture (stereo gets a slightly delayed, quieter second channel)"""
+
+    mono = synthesize_speech(seconds, sample_rate)
+
+    if channels == 1:
+        data = mono
+    else:
+        delay = int(0.005 * sample_rate)
+        second = np.concatenate([np.zeros(delay), mono[:-delay]]) * 0.7
+        data = np.stack([mono, second], axis=1)
+
+    # Written in blocks: some libsndfile builds crash on one huge Vorbis write
+    with sf.SoundFile(path, 'w', sample_rate, channels, subtype, format=file_format) as f:
+        for start in range(0, len(data), WRITE_BLOCK_FRAMES):
+            f.write(data[start:start + WRITE_BLOCK_FRAMES])
+
+
+def make_fixtures(force=False):
+    """
+    Create any missing fixtures
+
+    Returns:
+        List of fixture paths (formats this libsndfile can't write are skipped)
+    """
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    paths = []
+
+    for name, seconds, sample_rate, channels, file_format, subtype in FIXTURES:
+        path = os.path.join(FIXTURES_DIR, name)
+
+        if force or not os.path.exists(path):
+            try:
+                make_fixture(path, seconds, sample_rate, channels, file_format, subtype)
+                print(f"✅ Created {name}")
+            except (sf.LibsndfileError, ValueError) as e:
+                print(f"⚠️  Skipped {name}: {e}")
+                continue
+
+        paths.append(path)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate benchmark fixture recordings")
+    parser.add_argument('--force', action='store_true', help="Regenerate existing fixtures")
+    args = parser.parse_args()
+
+    make_fixtures(args.force)
+
+
+if __name__ == '__main__':
+    main()
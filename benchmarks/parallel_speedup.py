@@ -0,0 +1,52 @@
+"""
+Compare serial vs parallel (chunked) transcription on one recording.
+
+Usage:
+    python benchmarks/parallel_speedup.py recording.wav --workers 2 4 8 --min-segment 30
+"""
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.parallel_transcriber import speedup_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel transcription speedup report")
+    parser.add_argument('audio_path', help="Recording to transcribe")
+    parser.add_argument('--workers', type=int, nargs='+', help="Worker counts to try")
+    parser.add_argument('--min-segment', type=float, help="Minimum segment length in seconds")
+    parser.add_argument('--overlap', type=float, help="Overlap between segments in seconds")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = speedup_report(
+        args.audio_path,
+        worker_counts=args.workers,
+        min_segment_seconds=args.min_segment,
+        overlap_seconds=args.overlap
+    )
+
+    print("=" * 50)
+    print(f"🎧 {report['audio_path']} ({report['audio_seconds']}s of audio)")
+    print(f"Serial:   {report['serial']['seconds']}s "
+          f"(RTF {report['serial']['real_time_factor']})")
+
+    for run in report['parallel']:
+        print(f"{run['workers']} workers: {run['seconds']}s "
+              f"(RTF {run['real_time_factor']}, {run['segments']} segments, "
+              f"speedup x{run['speedup']})")
+    print("=" * 50)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Real-time factor and word error rate with and without resampling to the
+model's native rate.
+
+Recordings with a <name>.txt reference transcript next to them also get a WER.
+
+Usage:
+    python benchmarks/resample_benchmark.py [files or folders] --output report.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import find_recordings, load_reference, word_error_rate
+from app.audio_handler import VoskTranscriber
+from app.audio_stream import AudioStream
+from app.model_registry import get_model_sample_rate
+
+
+def run_once(transcriber, audio_path, target_rate):
+    """Transcribe one file with resampling on (target_rate) or off (None)"""
+
+    transcriber.target_rate = target_rate
+
+    start = time.perf_counter()
+    text = transcriber.transcribe(audio_path)
+    seconds = time.perf_counter() - start
+
+    duration = AudioStream(audio_path).duration
+
+    result = {
+        'seconds': round(seconds, 3),
+        'real_time_factor': round(seconds / duration, 4) if duration else None,
+        'wer': None
+    }
+
+    reference = load_reference(audio_path)
+    if reference is not None:
+        result['wer'] = word_error_rate(reference, text)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resampling benchmark (RTF and WER)")
+    parser.add_argument('paths', nargs='*', help="Recordings or folders (default: benchmarks/fixtures)")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.paths)
+    if not recordings:
+        print("❌ No recordings found")
+        return
+
+    transcriber = VoskTranscriber()
+    model_rate = get_model_sample_rate(transcriber.model_path)
+
+    report = []
+
+    print("=" * 50)
+    for audio_path in recordings:
+        stream = AudioStream(audio_path)
+
+        before = run_once(transcriber, audio_path, None)
+        after = run_once(transcriber, audio_path, model_rate)
+
+        report.append({
+            'audio_path': audio_path,
+            'sample_rate': stream.sample_rate,
+            'audio_seconds': round(stream.duration, 2),
+            'native_rate': before,
+            'resampled': after
+        })
+
+        print(f"🎧 {os.path.basename(audio_path)} ({stream.sample_rate} Hz -> {model_rate} Hz)")
+        print(f"   native:    RTF {before['real_time_factor']}  WER {before['wer']}")
+        print(f"   resampled: RTF {after['real_time_factor']}  WER {after['wer']}")
+    print("=" * 50)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
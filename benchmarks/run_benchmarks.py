@@ -0,0 +1,238 @@
+"""
+Transcription benchmark suite: real-time factor, peak memory and time per
+stage for every fixture recording, block size and worker count.
+
+Each run happens in a fresh forked process (the model is loaded once,
+before forking), so peak RSS is measured per run. The stages of the serial
+path are:
+
+    decode      reading, downmixing and resampling the audio (plus VAD if on)
+    recognizer  AcceptWaveform / Result / FinalResult
+    json        parsing the recognizer's JSON results
+
+With more than one worker the parallel path is used for recordings long
+enough to split; its decode stage covers loading the whole recording.
+
+Usage:
+    python benchmarks/run_benchmarks.py [files or folders] \\
+        --block-frames 2000 4000 8000 --workers 1 2 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import FIXTURES_DIR, find_recordings, load_reference, word_error_rate
+from benchmarks.make_fixtures import make_fixtures
+from config import Config
+from app.audio_handler import VoskTranscriber
+from app.audio_stream import probe_audio
+from app.model_registry import model_registry, get_resident_memory_mb
+
+
+def _peak_rss_mb(who):
+    """Peak RSS in MB of this process or of its finished children (Linux reports KB)"""
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def _run_case(audio_path, block_frames, workers, repeat, conn):
+    """Runs in a forked process; sends the result dict back over `conn`"""
+
+    try:
+        Config.AUDIO_BLOCK_FRAMES = block_frames
+
+        if workers > 1:
+            from app import parallel_transcriber
+            transcriber = parallel_transcriber.ParallelVoskTranscriber(workers=workers)
+        else:
+            transcriber = VoskTranscriber()
+
+        start_rss = get_resident_memory_mb()
+
+        # Keep the fastest run; the first one also pays for the recognizer
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = transcriber.transcribe(audio_path)
+            seconds = time.perf_counter() - start
+
+            if best is None or seconds < best[0]:
+                best = (seconds, text, dict(transcriber.last_run))
+
+        seconds, text, last_run = best
+
+        worker_peak = None
+        if workers > 1:
+            for executor in parallel_transcriber._executors.values():
+                executor.shutdown()
+            worker_peak = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+        conn.send({
+            'mode': last_run.get('mode'),
+            'segments': last_run.get('segments'),
+            'seconds': round(seconds, 3),
+            'stages': last_run.get('stages'),
+            'start_rss_mb': start_rss,
+            'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF),
+            'worker_peak_rss_mb': worker_peak,
+            'text': text
+        })
+
+    except Exception as e:
+        conn.send({'error': str(e)})
+
+    finally:
+        conn.close()
+
+
+def run_case(audio_path, block_frames, workers, repeat=1):
+    """
+    Benchmark one recording with one block size and worker count
+
+    Returns:
+        Result dictionary (with 'error' set if the run failed, or 'skipped'
+        if the recording can't be read)
+    """
+
+    info = {
+        'audio_path': audio_path,
+        'block_frames': block_frames,
+        'workers': workers
+    }
+
+    try:
+        audio_info = probe_audio(audio_path)
+    except Exception as e:
+        # Not audio, or a format only ffmpeg reads and ffmpeg isn't installed
+        info['skipped'] = f"Can't read recording: {str(e)}"
+        return info
+
+    # Containers like webm may not record their duration
+    duration = audio_info['duration_seconds'] or 0
+
+    info.update({
+        'format': audio_info['format'],
+        'sample_rate': audio_info['sample_rate'],
+        'channels': audio_info['channels'],
+        'audio_seconds': round(duration, 2)
+    })
+
+    context = multiprocessing.get_context('fork')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+
+    process = context.Process(
+        target=_run_case,
+        args=(audio_path, block_frames, workers, repeat, child_conn)
+    )
+    process.start()
+    child_conn.close()
+
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {'error': f"Benchmark process died (exit code {process.exitcode})"}
+
+    process.join()
+
+    info.update(result)
+
+    if 'seconds' in result and duration:
+        info['real_time_factor'] = round(result['seconds'] / duration, 4)
+        info['audio_seconds_per_second'] = round(duration / result['seconds'], 2)
+
+    text = info.pop('text', None)
+    reference = load_reference(audio_path)
+    info['wer'] = word_error_rate(reference, text or '') if reference is not None else None
+
+    return info
+
+
+def machine_info():
+    """Hardware and software the numbers were measured on"""
+
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'model_path': Config.VOSK_MODEL_PATH,
+        'resample_to_model_rate': Config.RESAMPLE_TO_MODEL_RATE,
+        'vad_enabled': Config.VAD_ENABLED
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription benchmark suite")
+    parser.add_argument('paths', nargs='*', help="Recordings or folders (default: benchmarks/fixtures)")
+    parser.add_argument('--block-frames', type=int, nargs='+', default=[Config.AUDIO_BLOCK_FRAMES],
+                        help="Frames read per block")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1],
+                        help="Worker counts (1 = serial path)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per case (fastest is kept)")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.paths:
+        make_fixtures()
+
+    recordings = find_recordings(args.paths or [FIXTURES_DIR])
+    if not recordings:
+        print("❌ No recordings found")
+        return
+
+    # Load once here; every forked run shares it
+    model_registry.get_model()
+
+    results = []
+
+    print("=" * 70)
+    for audio_path in recordings:
+        for block_frames in args.block_frames:
+            for workers in args.workers:
+                result = run_case(audio_path, block_frames, workers, args.repeat)
+                results.append(result)
+
+                label = f"{os.path.basename(audio_path)} [{block_frames} frames, {workers} workers]"
+                if 'skipped' in result:
+                    print(f"⚠️  {label}: skipped ({result['skipped']})")
+                    continue
+
+                if 'error' in result:
+                    print(f"❌ {label}: {result['error']}")
+                    continue
+
+                stages = result['stages'] or {}
+                stage_text = '  '.join(f"{name} {seconds:.2f}s" for name, seconds in stages.items())
+                print(f"🎧 {label}")
+                print(f"   {result['audio_seconds']}s audio in {result['seconds']}s "
+                      f"(RTF {result['real_time_factor']}, {result['mode']})  "
+                      f"peak RSS {result['peak_rss_mb']} MB")
+                print(f"   {stage_text}")
+    print("=" * 70)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': machine_info(),
+        'settings': {
+            'block_frames': args.block_frames,
+            'workers': args.workers,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
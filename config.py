@@ -31,6 +31,89 @@ class Config:
     SPEECH_ENGINE = os.getenv('SPEECH_ENGINE', 'vosk')
     VOSK_MODEL_PATH = os.getenv('VOSK_MODEL_PATH', 'models/vosk-model-small-en-us-0.15')
     MAX_AUDIO_SIZE_MB = int(os.getenv('MAX_AUDIO_SIZE_MB', 25))
+    MAX_AUDIO_DURATION_MINUTES = float(os.getenv('MAX_AUDIO_DURATION_MINUTES', 120))
     ALLOWED_AUDIO_FORMATS = os.getenv('ALLOWED_AUDIO_FORMATS', 'mp3,wav,m4a,ogg,webm').split(',')
     AUDIO_TEMP_DIR = os.getenv('AUDIO_TEMP_DIR', 'app/uploads')
-    AUTO_DELETE_AUDIO = os.getenv('AUTO_DELETE_AUDIO', 'True') == 'True'
\ No newline at end of file
+    AUTO_DELETE_AUDIO = os.getenv('AUTO_DELETE_AUDIO', 'True') == 'True'
+    AUDIO_BLOCK_FRAMES = int(os.getenv('AUDIO_BLOCK_FRAMES', 4000))
+    AUDIO_SPOOL_THRESHOLD_MB = float(os.getenv('AUDIO_SPOOL_THRESHOLD_MB', 10))
+    RESAMPLE_TO_MODEL_RATE = os.getenv('RESAMPLE_TO_MODEL_RATE', 'True') == 'True'
+    
+    # ffmpeg decodes what soundfile can't (m4a, webm/opus...); decoding is stopped
+    # if ffmpeg produces no output for FFMPEG_TIMEOUT seconds
+    FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+    FFPROBE_PATH = os.getenv('FFPROBE_PATH', 'ffprobe')
+    FFMPEG_TIMEOUT = float(os.getenv('FFMPEG_TIMEOUT', 600))
+    
+    # Extra named speech models, e.g. "en-large=models/vosk-model-en-us-0.22,de=models/vosk-model-de-0.21"
+    # ("default" is always VOSK_MODEL_PATH). Least recently used models are
+    # unloaded when loaded models use more than MODEL_MEMORY_BUDGET_MB (0 = no limit).
+    VOSK_MODELS = dict(
+        entry.strip().split('=', 1) for entry in os.getenv('VOSK_MODELS', '').split(',') if '=' in entry
+    )
+    MODEL_MEMORY_BUDGET_MB = float(os.getenv('MODEL_MEMORY_BUDGET_MB', 0))
+    
+    # Recognizer pool (reused KaldiRecognizers per model + sample rate)
+    RECOGNIZER_POOL_SIZE = int(os.getenv('RECOGNIZER_POOL_SIZE', 4))
+    RECOGNIZER_CHECKOUT_TIMEOUT = float(os.getenv('RECOGNIZER_CHECKOUT_TIMEOUT', 30))
+    
+    # Parallel transcription of long recordings (split at pauses, decode on several cores)
+    PARALLEL_TRANSCRIPTION = os.getenv('PARALLEL_TRANSCRIPTION', 'False') == 'True'
+    PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', os.cpu_count() or 1))
+    PARALLEL_MIN_SEGMENT_SECONDS = float(os.getenv('PARALLEL_MIN_SEGMENT_SECONDS', 30))
+    PARALLEL_OVERLAP_SECONDS = float(os.getenv('PARALLEL_OVERLAP_SECONDS', 1.0))
+    
+    # Two-pass decoding: utterances the default model is unsure about (mean word
+    # confidence below REDECODE_CONFIDENCE) are decoded again with REDECODE_MODEL,
+    # a name from VOSK_MODELS (empty = off)
+    REDECODE_MODEL = os.getenv('REDECODE_MODEL', '')
+    REDECODE_CONFIDENCE = float(os.getenv('REDECODE_CONFIDENCE', 0.75))
+    REDECODE_PADDING_SECONDS = float(os.getenv('REDECODE_PADDING_SECONDS', 0.3))
+    
+    # Voice activity detection (skip silence before decoding)
+    VAD_ENABLED = os.getenv('VAD_ENABLED', 'False') == 'True'
+    VAD_FRAME_MS = int(os.getenv('VAD_FRAME_MS', 30))
+    VAD_PADDING_MS = int(os.getenv('VAD_PADDING_MS', 300))
+    VAD_MIN_ENERGY = float(os.getenv('VAD_MIN_ENERGY', 150))
+    VAD_ENERGY_RATIO = float(os.getenv('VAD_ENERGY_RATIO', 3.0))
+    VAD_ZCR_THRESHOLD = float(os.getenv('VAD_ZCR_THRESHOLD', 0.25))
+    
+    # Signal-quality pre-check: QUALITY_WINDOWS short windows spread over an
+    # upload are analysed before it is queued, and silent, clipped or
+    # noise-only recordings are rejected without decoding them
+    QUALITY_CHECK_ENABLED = os.getenv('QUALITY_CHECK_ENABLED', 'True') == 'True'
+    QUALITY_WINDOWS = int(os.getenv('QUALITY_WINDOWS', 30))
+    QUALITY_WINDOW_SECONDS = float(os.getenv('QUALITY_WINDOW_SECONDS', 1.0))
+    QUALITY_MIN_RMS_DBFS = float(os.getenv('QUALITY_MIN_RMS_DBFS', -60))
+    QUALITY_MAX_CLIPPING = float(os.getenv('QUALITY_MAX_CLIPPING', 0.1))
+    QUALITY_MIN_SPEECH_FRACTION = float(os.getenv('QUALITY_MIN_SPEECH_FRACTION', 0.02))
+    
+    # Transcript cache (same recording + same settings = same transcript)
+    TRANSCRIPT_CACHE_ENABLED = os.getenv('TRANSCRIPT_CACHE_ENABLED', 'True') == 'True'
+    TRANSCRIPT_CACHE_PATH = os.getenv('TRANSCRIPT_CACHE_PATH', 'database/transcript_cache.db')
+    TRANSCRIPT_CACHE_MAX_MB = float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', 50))
+    
+    # Live transcription (browser streams audio while recording); each open
+    # session holds one of LIVE_MAX_SESSIONS recognizers kept apart from the pool above
+    LIVE_SESSION_TIMEOUT = int(os.getenv('LIVE_SESSION_TIMEOUT', 60))
+    LIVE_MAX_SESSIONS = int(os.getenv('LIVE_MAX_SESSIONS', 4))
+    
+    # Background transcription jobs
+    TRANSCRIPTION_WORKERS = int(os.getenv('TRANSCRIPTION_WORKERS', 2))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 3600))
+    JOB_ESTIMATED_RTF = float(os.getenv('JOB_ESTIMATED_RTF', 0.2))
+    JOB_AGING_RATE = float(os.getenv('JOB_AGING_RATE', 1.0))
+    
+    # Checkpoints: long transcriptions save their finished text every
+    # CHECKPOINT_INTERVAL_SECONDS of audio, so a retry after a crash resumes there
+    CHECKPOINTS_ENABLED = os.getenv('CHECKPOINTS_ENABLED', 'True') == 'True'
+    CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'database/checkpoints.db')
+    CHECKPOINT_INTERVAL_SECONDS = float(os.getenv('CHECKPOINT_INTERVAL_SECONDS', 60))
+    CHECKPOINT_TTL_HOURS = float(os.getenv('CHECKPOINT_TTL_HOURS', 24))
+    
+    # How often a running transcription checks whether its HTTP client disconnected
+    CANCEL_POLL_SECONDS = float(os.getenv('CANCEL_POLL_SECONDS', 0.5))
+    
+    # Startup warm-up (load models and decode a synthetic clip before /ready says yes)
+    WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'False') == 'True'
+    WARMUP_MODELS = os.getenv('WARMUP_MODELS', 'default').split(',')
\ No newline at end of file
@@ -1,4 +1,6 @@
+import os
 from app import app
+from app.warmup import start_warmup
 from config import Config
 
 if __name__ == '__main__':
@@ -10,6 +12,10 @@ if __name__ == '__main__':
     print("⏹️  Press Ctrl+C to stop")
     print("=" * 50)
     
+    # With the debug reloader, only the child process serves requests
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
+    
     app.run(
         debug=Config.DEBUG,
         host=Config.HOST,
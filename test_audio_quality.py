@@ -0,0 +1,37 @@
+import numpy as np
+from app.audio_quality import measure_signal, judge_signal
+
+
+RATE = 16000
+
+
+def noise(seconds, level, seed=0):
+    return np.random.default_rng(seed).normal(0, level, int(seconds * RATE))
+
+
+def test_silent_lead_in_does_not_hide_steady_noise():
+    # A muted microphone for the first 20 seconds, then only hiss
+    samples = np.concatenate([np.zeros(20 * RATE), noise(40, 1000)]).astype(np.int16)
+
+    report = measure_signal(samples, RATE)
+    reason, _ = judge_signal(report)
+    print(f"Silent lead-in + noise: speech {report['speech_fraction']:.1%}, "
+          f"floor {report['noise_floor_dbfs']} dBFS -> {reason}")
+    assert reason == 'no_speech'
+
+
+def test_silent_lead_in_keeps_speech():
+    # Half-second bursts well above a quiet background, after the same lead-in
+    bursts = noise(40, 100, seed=1) * np.where(np.arange(40 * RATE) // (RATE // 2) % 2, 30, 1)
+    samples = np.concatenate([np.zeros(20 * RATE), bursts]).astype(np.int16)
+
+    report = measure_signal(samples, RATE)
+    reason, _ = judge_signal(report)
+    print(f"Silent lead-in + speech: speech {report['speech_fraction']:.1%} -> {reason}")
+    assert reason is None
+
+
+if __name__ == "__main__":
+    test_silent_lead_in_does_not_hide_steady_noise()
+    test_silent_lead_in_keeps_speech()
+    print("✅ Quality check measures noise against the audible part of a recording")
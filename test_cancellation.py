@@ -0,0 +1,74 @@
+import io
+import time
+import socket
+import threading
+import numpy as np
+import soundfile as sf
+from werkzeug.serving import make_server
+from app import app
+from app.cancellation import cancellation_stats
+
+
+def make_wav(seconds, rate=16000):
+    """Tone bursts, so the recognizer has real work to do"""
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (8000 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 2 * t) > 0)).astype(np.int16)
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, rate, format='WAV', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+def start_server():
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def wait_for_cancel(before, timeout):
+    """Seconds until a new client_disconnect is counted (None if it never is)"""
+    start = time.time()
+    while time.time() - start < timeout:
+        if cancellation_stats.get_stats()['by_reason'].get('client_disconnect', 0) > before:
+            return time.time() - start
+        time.sleep(0.1)
+    return None
+
+
+def upload_and_close(port, body, send_bytes, close_after):
+    """POST `body` to /transcribe/stream, send `send_bytes` of it, then hang up"""
+    client = socket.create_connection(('127.0.0.1', port))
+    client.sendall(f"POST /transcribe/stream HTTP/1.1\r\nHost: localhost\r\n"
+                   f"Content-Type: audio/wav\r\nContent-Length: {len(body)}\r\n\r\n".encode())
+    client.sendall(body[:send_bytes])
+    time.sleep(close_after)
+    client.close()
+
+
+def test_stream_cancelled_when_client_closes():
+    server = start_server()
+
+    try:
+        # Whole body sent, then the client hangs up long before decoding is done
+        before = cancellation_stats.get_stats()['by_reason'].get('client_disconnect', 0)
+        body = make_wav(60)
+        upload_and_close(server.server_port, body, len(body), close_after=1)
+        elapsed = wait_for_cancel(before, timeout=20)
+        print(f"Full upload, client closed: cancelled after {elapsed}s")
+        assert elapsed is not None and elapsed < 5
+
+        # Client hangs up part-way through the upload
+        before = cancellation_stats.get_stats()['by_reason'].get('client_disconnect', 0)
+        body = make_wav(300)
+        upload_and_close(server.server_port, body, len(body) // 4, close_after=1)
+        elapsed = wait_for_cancel(before, timeout=30)
+        print(f"Partial upload, client closed: cancelled after {elapsed}s")
+        assert elapsed is not None
+
+    finally:
+        server.shutdown()
+
+    print("✅ Streamed transcriptions stop when the client disconnects")
+
+
+if __name__ == "__main__":
+    test_stream_cancelled_when_client_closes()
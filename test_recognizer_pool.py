@@ -0,0 +1,113 @@
+import os
+import json
+import tempfile
+import numpy as np
+from config import Config
+from app.recognizer_pool import RecognizerPool
+
+RATE = 16000
+
+VOWEL_FORMANTS = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240),
+                  (530, 1840, 2480), (660, 1720, 2410), (490, 1350, 1690)]
+
+
+def make_babble(syllables, seed):
+    """Vowel-like syllables and pauses: enough for the model to hear words"""
+
+    rng = np.random.default_rng(seed)
+    parts = []
+
+    for _ in range(syllables):
+        n = int(rng.uniform(0.12, 0.3) * RATE)
+        t = np.arange(n) / RATE
+        phase = 2 * np.pi * np.cumsum(110 + 20 * np.sin(2 * np.pi * 2 * t)) / RATE
+        formants = np.array(VOWEL_FORMANTS[rng.integers(len(VOWEL_FORMANTS))])
+
+        syllable = np.zeros(n)
+        for k in range(1, 30):
+            gain = np.sum(np.exp(-((k * 120 - formants) / 90.0) ** 2)) + 0.02
+            syllable += gain * np.sin(k * phase) / k ** 0.5
+        parts.append(syllable * np.hanning(n))
+
+        if rng.random() < 0.2:
+            parts.append(np.zeros(int(rng.uniform(0.2, 0.6) * RATE)))
+
+    samples = np.concatenate(parts)
+    return (samples / np.abs(samples).max() * 12000).astype(np.int16)
+
+
+def undithered_model(folder):
+    """
+    The default model with feature dither off, so decoding is repeatable
+
+    Kaldi adds random dither to the features by default, which alone makes
+    two decodes of the same audio differ slightly.
+    """
+
+    model_path = os.path.abspath(Config.VOSK_MODEL_PATH)
+
+    for name in os.listdir(model_path):
+        if name != 'conf':
+            os.symlink(os.path.join(model_path, name), os.path.join(folder, name))
+
+    os.mkdir(os.path.join(folder, 'conf'))
+    for name in os.listdir(os.path.join(model_path, 'conf')):
+        with open(os.path.join(model_path, 'conf', name)) as f:
+            conf = f.read()
+        if name == 'mfcc.conf':
+            conf = conf.rstrip('\n') + '\n--dither=0\n'
+        with open(os.path.join(folder, 'conf', name), 'w') as f:
+            f.write(conf)
+
+    return folder
+
+
+def decode(pool, model_path, samples):
+    """Words and confidences of one recording, decoded with a pooled recognizer"""
+
+    results = []
+
+    with pool.recognizer(RATE, model_path) as rec:
+        for position in range(0, len(samples), 4000):
+            if rec.AcceptWaveform(samples[position:position + 4000].tobytes()):
+                results.append(json.loads(rec.Result()))
+        results.append(json.loads(rec.FinalResult()))
+
+    return [(word['word'], round(word['conf'], 4)) for result in results for word in result.get('result', [])]
+
+
+def test_reused_recognizer_matches_fresh_one():
+    first = make_babble(70, seed=1)
+    second = make_babble(70, seed=2)
+
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = undithered_model(folder)
+
+        fresh = decode(RecognizerPool(max_size=1), model_path, second)
+
+        # One slot, so the second file gets the recognizer the first one used
+        pool = RecognizerPool(max_size=1)
+        decode(pool, model_path, first)
+        reused = decode(pool, model_path, second)
+
+        print(f"Fresh:  {' '.join(word for word, _ in fresh)}")
+        print(f"Reused: {' '.join(word for word, _ in reused)}")
+        assert fresh
+        assert reused == fresh
+        assert pool.get_stats()['reused'] == 1
+
+        # Given back mid-utterance (e.g. a cancelled transcription): not reused
+        try:
+            with pool.recognizer(RATE, model_path) as rec:
+                rec.AcceptWaveform(first[:len(first) // 2].tobytes())
+                raise RuntimeError("stopped mid-utterance")
+        except RuntimeError:
+            pass
+
+        assert decode(pool, model_path, second) == fresh
+        assert pool.get_stats()['discarded'] == 1
+
+
+if __name__ == "__main__":
+    test_reused_recognizer_matches_fresh_one()
+    print("✅ Pooled recognizers transcribe like new ones")